@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .metrics import timing
+from .models import Child, UserProfile
+
+# Bump when the layout of the cached context changes.
+CONTEXT_FORMAT = 2
+
+# User columns kept in the context; any other attribute is loaded on access.
+USER_FIELDS = ['id', 'username', 'is_active', 'is_staff', 'is_superuser']
+
+
+def context_key(user_id):
+    return f'auth-context:{CONTEXT_FORMAT}:{user_id}'
+
+
+def version_key(user_id):
+    return f'auth-context-version:{user_id}'
+
+
+def build_user_context(user_id):
+    """
+    Load what authentication and personalization need to know about a user:
+    a few User columns, the profile's parent type and the children's stored
+    (age_group, gender) segments. Returns None if the user doesn't exist.
+    Read from the primary, as the context is cached.
+    """
+    user = User.objects.using(DEFAULT_DB_ALIAS).filter(**{api_settings.USER_ID_FIELD: user_id}).values(*USER_FIELDS, 'password').first()
+    if user is None:
+        return None
+    password = user.pop('password')
+    return {
+        'user': user,
+        'revoke_hash': get_md5_hash_password(password) if api_settings.CHECK_REVOKE_TOKEN else None,
+        'parent_type': UserProfile.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user['id']).values_list('parent_type', flat=True).first(),
+        'children': list(Child.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user['id']).values_list('age_group', 'gender')),
+    }
+
+
+def get_user_context(user_id):
+    """
+    Return the context of a user from the cache, building it on a miss or when
+    its version is behind the user's current one.
+    """
+    entry_key, current_key = context_key(user_id), version_key(user_id)
+    cached = cache.get_many([entry_key, current_key])
+    version = cached.get(current_key, 0)
+    context = cached.get(entry_key)
+    if context is not None and context['version'] == version:
+        return context
+
+    context = build_user_context(user_id)
+    if context is not None:
+        context['version'] = version
+        cache.set(entry_key, context, settings.AUTH_CONTEXT_TIMEOUT)
+    return context
+
+
+def invalidate_user_context(user_id):
+    """
+    Move the user to a new context version, so a context computed concurrently
+    from the old data is never read back.
+    """
+    cache.delete(context_key(user_id))
+    try:
+        cache.incr(version_key(user_id))
+    except ValueError:
+        cache.set(version_key(user_id), 1, None)
+
+
+def user_context(user):
+    """
+    Context of ``user``, as attached by CachedJWTAuthentication or from the cache.
+    """
+    return getattr(user, 'user_context', None) or get_user_context(user.pk)
+
+
+def user_from_context(context):
+    # A persisted User instance holding only USER_FIELDS; deferred fields are
+    # fetched from the database if a view reads them.
+    fields = context['user']
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in fields]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [fields[name] for name in names])
+    user.user_context = context
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication resolving the token's user from a cached per-user context
+    instead of the database, with the same active and revocation checks.
+    """
+
+    def authenticate(self, request):
+        with timing('authentication'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        context = get_user_context(user_id)
+        if context is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not context['user']['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != context['revoke_hash']:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user_from_context(context)
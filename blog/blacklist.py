@@ -0,0 +1,125 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings: no false negatives, and false
+    positives at about ``error_rate`` once ``capacity`` items are added.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevokedTokenFilter:
+    """
+    In-process view of the refresh token blacklist, so checking a token that
+    isn't revoked - the common case - needs no query.
+
+    A Bloom filter answers "definitely not revoked"; possible hits are
+    confirmed against an LRU set of exact JTIs and only fall back to the
+    database when the JTI has been evicted from it. The filter is rotated
+    every REFRESH_TOKEN_LIFETIME, keeping the previous generation, so JTIs of
+    tokens that have since expired age out. Tokens blacklisted by other
+    workers are picked up by an incremental sync every SYNC_INTERVAL seconds.
+    """
+
+    def __init__(self, capacity, error_rate, confirm_size, sync_interval, lifetime):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.confirm_size = confirm_size
+        self.sync_interval = sync_interval
+        self.lifetime = lifetime.total_seconds()
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.current = BloomFilter(self.capacity, self.error_rate)
+            self.previous = None
+            self.rotated_at = time.monotonic()
+            self.confirmed = OrderedDict()
+            self.synced_at = None
+            self.watermark = None
+
+    def _rotate(self):
+        if time.monotonic() - self.rotated_at >= self.lifetime:
+            self.previous = self.current
+            self.current = BloomFilter(self.capacity, self.error_rate)
+            self.rotated_at = time.monotonic()
+
+    def _add(self, jti, expires_at):
+        self._rotate()
+        self.current.add(jti)
+        self.confirmed[jti] = expires_at
+        self.confirmed.move_to_end(jti)
+        while len(self.confirmed) > self.confirm_size:
+            self.confirmed.popitem(last=False)
+
+    def add(self, jti, expires_at):
+        with self.lock:
+            self._add(jti, expires_at)
+
+    def sync(self):
+        """
+        Load blacklisted tokens that haven't expired, all of them on the first
+        call (warm up) and only those blacklisted since the last sync after.
+        """
+        now = timezone.now()
+        queryset = BlacklistedToken.objects.filter(token__expires_at__gt=now)
+        if self.watermark is not None:
+            queryset = queryset.filter(blacklisted_at__gte=self.watermark)
+        rows = list(queryset.values_list('token__jti', 'token__expires_at', 'blacklisted_at'))
+        with self.lock:
+            for jti, expires_at, blacklisted_at in rows:
+                self._add(jti, expires_at)
+                if self.watermark is None or blacklisted_at > self.watermark:
+                    self.watermark = blacklisted_at
+            self.watermark = self.watermark or now
+            self.synced_at = time.monotonic()
+
+    def __contains__(self, jti):
+        if self.synced_at is None or time.monotonic() - self.synced_at >= self.sync_interval:
+            self.sync()
+        with self.lock:
+            self._rotate()
+            if jti not in self.current and (self.previous is None or jti not in self.previous):
+                return False
+            if jti in self.confirmed:
+                self.confirmed.move_to_end(jti)
+                return True
+        # A Bloom false positive, or a revoked JTI evicted from the LRU set.
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+revoked_tokens = RevokedTokenFilter(
+    capacity=settings.TOKEN_BLACKLIST_FILTER['CAPACITY'],
+    error_rate=settings.TOKEN_BLACKLIST_FILTER['ERROR_RATE'],
+    confirm_size=settings.TOKEN_BLACKLIST_FILTER['CONFIRM_SIZE'],
+    sync_interval=settings.TOKEN_BLACKLIST_FILTER['SYNC_INTERVAL'],
+    lifetime=api_settings.REFRESH_TOKEN_LIFETIME,
+)
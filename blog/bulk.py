@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+class BulkModelMixin:
+    """
+    Adds a ``bulk/`` route to a ModelViewSet taking a list payload:
+
+    - POST creates the objects with ``bulk_create``, owned by the request user;
+    - PATCH partially updates ``[{"id": ..., <fields>}]`` with ``bulk_update``;
+    - DELETE deletes ``[id, ...]`` with one query.
+
+    Objects are looked up in ``get_queryset()``, so the same ownership rules
+    apply as to single-object requests. Each request runs in one transaction
+    and either applies every item or, if any item fails, none; the error
+    response lists the failures by payload index.
+
+    Bulk writes don't call ``save()`` or send model signals, so viewsets
+    override ``prepare_bulk_instance()`` and ``bulk_written()`` for the
+    work those would have done.
+    """
+    owner_field = None
+    # Model fields prepare_bulk_instance() may change besides the payload's.
+    bulk_derived_fields = []
+
+    def prepare_bulk_instance(self, instance):
+        pass
+
+    def bulk_written(self, instances, previous=()):
+        """
+        Called after a bulk write with the written instances and, for updates,
+        copies of them from before the write.
+        """
+
+    def get_bulk_payload(self, request):
+        if not isinstance(request.data, list):
+            raise ValidationError({'detail': 'Expected a list of items.'})
+        if len(request.data) > settings.BULK_MAX_ITEMS:
+            raise ValidationError({'detail': f'At most {settings.BULK_MAX_ITEMS} items per request.'})
+        return request.data
+
+    def bulk_error_response(self, errors):
+        return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        payload = self.get_bulk_payload(request)
+        with transaction.atomic():
+            if request.method == 'POST':
+                return self.bulk_create(payload)
+            if request.method == 'PATCH':
+                return self.bulk_update(payload)
+            return self.bulk_destroy(payload)
+
+    def bulk_create(self, payload):
+        serializer = self.get_serializer(data=payload, many=True)
+        if not serializer.is_valid():
+            return self.bulk_error_response([
+                {'index': index, 'errors': errors} for index, errors in enumerate(serializer.errors) if errors
+            ])
+
+        model = self.get_queryset().model
+        instances = []
+        for validated_data in serializer.validated_data:
+            instance = model(**validated_data, **{self.owner_field: self.request.user})
+            self.prepare_bulk_instance(instance)
+            instances.append(instance)
+        model.objects.bulk_create(instances, batch_size=settings.BULK_BATCH_SIZE)
+        self.bulk_written(instances)
+        return Response(self.get_serializer(instances, many=True).data, status=status.HTTP_201_CREATED)
+
+    def _lookup(self, ids):
+        # Ids that aren't integers can't match and are reported as not found.
+        valid_ids = [pk for pk in ids if isinstance(pk, int) and not isinstance(pk, bool)]
+        return self.get_queryset().in_bulk(valid_ids)
+
+    def bulk_update(self, payload):
+        ids = [item.get('id') if isinstance(item, dict) else None for item in payload]
+        found = self._lookup(ids)
+
+        errors, instances, previous, fields = [], [], [], set()
+        for index, (pk, item) in enumerate(zip(ids, payload)):
+            instance = found.get(pk) if isinstance(pk, int) else None
+            if instance is None:
+                errors.append({'index': index, 'id': pk, 'errors': {'detail': 'Not found.'}})
+                continue
+            serializer = self.get_serializer(instance, data=item, partial=True)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'id': pk, 'errors': serializer.errors})
+                continue
+            previous.append(self.get_queryset().model(**{
+                field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields
+            }))
+            for name, value in serializer.validated_data.items():
+                setattr(instance, name, value)
+            fields.update(serializer.validated_data)
+            self.prepare_bulk_instance(instance)
+            instances.append(instance)
+        if errors:
+            return self.bulk_error_response(errors)
+
+        if instances:
+            model = self.get_queryset().model
+            now = timezone.now()
+            for field in model._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    for instance in instances:
+                        setattr(instance, field.attname, now)
+                    fields.add(field.name)
+            fields.update(self.bulk_derived_fields)
+            model.objects.bulk_update(instances, fields, batch_size=settings.BULK_BATCH_SIZE)
+            self.bulk_written(instances, previous)
+        return Response(self.get_serializer(instances, many=True).data)
+
+    def bulk_destroy(self, payload):
+        found = self._lookup(payload)
+        errors = [
+            {'index': index, 'id': pk, 'errors': {'detail': 'Not found.'}}
+            for index, pk in enumerate(payload) if not (isinstance(pk, int) and pk in found)
+        ]
+        if errors:
+            return self.bulk_error_response(errors)
+
+        self.get_queryset().filter(pk__in=found).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,228 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, close_old_connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Blog, Vlog, Child, AGE_GROUP_CHOICES
+from .serializers import blog_summary_values_serializer, vlog_values_serializer
+
+# The home feed only depends on the (age_group, gender) pairs of a user's children,
+# so serialized candidate lists are cached per segment and shared by every parent.
+FEED_CACHE_PREFIX = 'feed'
+
+# Pseudo segment used for parents without children: every published item.
+ALL_SEGMENT = ('*', '*')
+
+AGE_BUCKETS = [value for value, _ in AGE_GROUP_CHOICES]
+CHILD_GENDERS = [value for value, _ in Child.GENDER_CHOICES]
+
+
+def segment_key(segment):
+    age_group, gender = segment
+    return f'{FEED_CACHE_PREFIX}:{age_group}:{gender}'
+
+
+def segment_validators_key(segment):
+    age_group, gender = segment
+    return f'{FEED_CACHE_PREFIX}-validators:{age_group}:{gender}'
+
+
+def segment_validators(feed):
+    """
+    Last modification time and item count of a segment feed, the basis of
+    conditional GET validators. The count catches deletions, which don't move
+    the last modification time.
+    """
+    items = feed['blogs'] + feed['vlogs']
+    return {
+        'last_modified': max((parse_datetime(item['updated_at']) for item in items), default=None),
+        'count': len(items),
+    }
+
+
+def _cache_entries(segment, feed):
+    return {
+        segment_key(segment): feed,
+        segment_validators_key(segment): segment_validators(feed),
+    }
+
+
+def children_segments(children):
+    """
+    Segments of a user's children, given as their stored (age_group, gender).
+    """
+    return [(age_group, gender) for age_group, gender in children]
+
+
+def segment_filter(segment):
+    if segment == ALL_SEGMENT:
+        return Q(status=True)
+    age_group, gender = segment
+    return (Q(age_group=age_group) | Q(gender=gender)) & Q(status=True)
+
+
+def feed_queryset(model, segments):
+    """
+    Published items of ``model`` visible to any of the given segments.
+    """
+    query = Q()
+    for segment in segments or [ALL_SEGMENT]:
+        query |= segment_filter(segment)
+    return model.objects.filter(query)
+
+
+def build_segment_feed(segment):
+    """
+    Query and serialize the published blogs and vlogs visible to one segment.
+    Blogs are summarized; only the summary columns are read. The rows come
+    from the primary: a replica lagging behind the write that invalidated the
+    segment would have its old feed cached for FEED_CACHE_TIMEOUT.
+    """
+    return {
+        'blogs': blog_summary_values_serializer.serialize(feed_queryset(Blog, [segment]).using(DEFAULT_DB_ALIAS)),
+        'vlogs': vlog_values_serializer.serialize(feed_queryset(Vlog, [segment]).using(DEFAULT_DB_ALIAS)),
+    }
+
+
+def get_segment_feeds(segments):
+    """
+    Return {segment: feed} for the given segments, building and caching misses.
+    """
+    keys = {segment_key(segment): segment for segment in segments}
+    cached = cache.get_many(keys)
+    feeds = {keys[key]: feed for key, feed in cached.items()}
+
+    missing = {}
+    for segment in keys.values():
+        if segment not in feeds:
+            feeds[segment] = build_segment_feed(segment)
+            missing.update(_cache_entries(segment, feeds[segment]))
+    if missing:
+        cache.set_many(missing, settings.FEED_CACHE_TIMEOUT)
+    return feeds
+
+
+def get_feed_validators(segments):
+    """
+    Return the ETag basis of the feed of ``segments`` without loading the feed
+    itself, unless a segment has to be built.
+    """
+    segments = sorted(set(segments)) or [ALL_SEGMENT]
+    keys = {segment_validators_key(segment): segment for segment in segments}
+    cached = cache.get_many(keys)
+    validators = {keys[key]: value for key, value in cached.items()}
+    missing = [segment for segment in segments if segment not in validators]
+    for segment, feed in get_segment_feeds(missing).items():
+        validators[segment] = segment_validators(feed)
+    return [(segment, validators[segment]['count'], validators[segment]['last_modified']) for segment in segments]
+
+
+def _merge(lists):
+    if len(lists) == 1:
+        return list(lists[0])
+    items = {}
+    for items_list in lists:
+        for item in items_list:
+            items[item['id']] = item
+    return sorted(
+        items.values(),
+        key=lambda item: (parse_datetime(item['published_at']), item['id']),
+        reverse=True,
+    )
+
+
+def _combine(segments, feeds):
+    return {
+        'blogs': _merge([feeds[segment]['blogs'] for segment in segments]),
+        'vlogs': _merge([feeds[segment]['vlogs'] for segment in segments]),
+    }
+
+
+def get_feed(segments):
+    """
+    Build the home feed for a list of (age_group, gender) child segments.
+    An empty list means the user has no children and sees everything published.
+    """
+    segments = list(dict.fromkeys(segments)) or [ALL_SEGMENT]
+    return _combine(segments, get_segment_feeds(segments))
+
+
+async def _run_query(func, *args):
+    # Django's async ORM runs every query on the one thread-sensitive executor,
+    # so to overlap queries each gets its own worker thread and connection,
+    # released afterwards the way request_finished would.
+    def run():
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return await sync_to_async(run, thread_sensitive=False)()
+
+
+async def abuild_segment_feed(segment):
+    """
+    Async build_segment_feed() running the blog and vlog queries concurrently.
+    """
+    blogs, vlogs = await asyncio.gather(
+        _run_query(blog_summary_values_serializer.serialize, feed_queryset(Blog, [segment]).using(DEFAULT_DB_ALIAS)),
+        _run_query(vlog_values_serializer.serialize, feed_queryset(Vlog, [segment]).using(DEFAULT_DB_ALIAS)),
+    )
+    return {'blogs': blogs, 'vlogs': vlogs}
+
+
+async def aget_feed(segments):
+    """
+    Async get_feed(); segments missing from the cache are built concurrently.
+    """
+    segments = list(dict.fromkeys(segments)) or [ALL_SEGMENT]
+    keys = {segment_key(segment): segment for segment in segments}
+    cached = await cache.aget_many(keys)
+    feeds = {keys[key]: feed for key, feed in cached.items()}
+
+    missing_keys = [key for key, segment in keys.items() if segment not in feeds]
+    built = await asyncio.gather(*(abuild_segment_feed(keys[key]) for key in missing_keys))
+    if built:
+        missing = {}
+        for key, feed in zip(missing_keys, built):
+            feeds[keys[key]] = feed
+            missing.update(_cache_entries(keys[key], feed))
+        await cache.aset_many(missing, settings.FEED_CACHE_TIMEOUT)
+    return _combine(segments, feeds)
+
+
+def affected_segments(age_group, gender):
+    """
+    Segments whose feed may contain an item with the given age group and gender.
+    """
+    segments = [
+        (bucket, child_gender)
+        for bucket in AGE_BUCKETS
+        for child_gender in CHILD_GENDERS
+        if bucket == age_group or child_gender == gender
+    ]
+    segments.append(ALL_SEGMENT)
+    return segments
+
+
+def invalidate_segments(*attributes):
+    """
+    Drop the cached feeds for every segment touched by the given
+    (age_group, gender) pairs.
+    """
+    keys = set()
+    for age_group, gender in attributes:
+        for segment in affected_segments(age_group, gender):
+            keys.update((segment_key(segment), segment_validators_key(segment)))
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_items(*items):
+    """
+    Drop the cached feeds that may contain any of the given blogs or vlogs.
+    """
+    invalidate_segments(*{(item.age_group, item.gender) for item in items})
@@ -0,0 +1,123 @@
+import gzip
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+# Optional: without it responses are only gzip-compressed.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_coding_re = _lazy_re_compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def accepted_encodings(accept_encoding):
+    """
+    Codings of an Accept-Encoding header with a non-zero quality.
+    """
+    codings = set()
+    for part in accept_encoding.split(','):
+        match = _coding_re.match(part)
+        if match:
+            coding, quality = match.groups()
+            try:
+                if quality is None or float(quality) > 0:
+                    codings.add(coding.lower())
+            except ValueError:
+                pass
+    return codings
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION['BROTLI_QUALITY'])
+    return gzip.compress(content, compresslevel=settings.COMPRESSION['GZIP_LEVEL'], mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    # Every chunk is flushed so a streamed response keeps streaming.
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=settings.COMPRESSION['BROTLI_QUALITY'])
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(settings.COMPRESSION['GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compress API responses (COMPRESSION['CONTENT_TYPES']) with brotli (when
+    installed) or gzip, as the client's Accept-Encoding allows. Bodies under COMPRESSION['MIN_SIZE'] bytes are sent
+    as they are, since compressing them saves less than it costs; streamed
+    responses are always compressed, chunk by chunk.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code == 304:
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in settings.COMPRESSION['CONTENT_TYPES']:
+            return response
+        # The response differs by Accept-Encoding whether or not this one is compressed.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION['MIN_SIZE']:
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body is a different byte sequence: a strong ETag
+        # becomes weak, as Django's GZipMiddleware does.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,46 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+
+def make_etag(*parts):
+    """
+    Strong ETag from the repr of ``parts``, e.g. ids, counts and timestamps.
+    """
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def conditional_response(request, etag, get_response):
+    """
+    Answer 304 Not Modified (or 412) when the client's validators match
+    ``etag``. Otherwise build the response with ``get_response()`` and attach
+    the ETag to it. No Last-Modified is sent: the newest updated_at doesn't
+    move when items are deleted, unpublished or leave a feed, so
+    If-Modified-Since alone would answer 304 for a changed response.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = get_response()
+    if request.method in ('GET', 'HEAD') and response.status_code in (200, 304) and etag:
+        response.headers.setdefault('ETag', etag)
+    # Responses depend on the authenticated user: keep them out of shared caches.
+    patch_cache_control(response, private=True)
+    return response
+
+
+class ConditionalListMixin:
+    """
+    Validators for a viewset's list action from one aggregate query over the
+    filtered queryset, checked before the page is fetched and serialized.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        aggregate = queryset.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        etag = make_etag(aggregate['count'], aggregate['last_modified'], request.GET.urlencode())
+        return conditional_response(
+            request, etag,
+            lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs),
+        )
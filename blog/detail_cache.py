@@ -0,0 +1,163 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Serialized blogs and vlogs for the detail endpoint are cached under keys
+# carrying a per-object version. Saving or deleting an object gives it a new
+# version, so readers never see a stale payload and nothing has to be deleted:
+# old payloads expire on their own.
+DETAIL_CACHE_PREFIX = 'detail'
+
+# Seconds between checks while another request recomputes a payload.
+POLL_INTERVAL = 0.01
+
+
+class LRUCache:
+    """
+    Thread-safe in-process mapping keeping the ``max_entries`` most recently
+    used entries.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Local tier in front of the shared cache. Its keys are versioned too, so it
+# can't serve a payload the shared cache no longer would.
+local_cache = LRUCache(settings.DETAIL_CACHE['LOCAL_MAX_ENTRIES'])
+
+
+def version_key(kind, pk):
+    return f'{DETAIL_CACHE_PREFIX}-version:{kind}:{pk}'
+
+
+def payload_key(kind, pk, version):
+    return f'{DETAIL_CACHE_PREFIX}:{kind}:{pk}:{version}'
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def kind_of(instance):
+    return instance._meta.model_name
+
+
+def bump_versions(keys):
+    cache.set_many({key: new_version() for key in keys}, None)
+
+
+def invalidate_details(*instances, using=DEFAULT_DB_ALIAS):
+    """
+    Give the cached payloads of the given blogs or vlogs new versions.
+    """
+    keys = [version_key(kind_of(instance), instance.pk) for instance in instances]
+    if not keys or not settings.DETAIL_CACHE['ENABLED']:
+        return
+    bump_versions(keys)
+    # And again on commit: a request reading between the first bump and the
+    # commit cached the old row under the new version.
+    transaction.on_commit(lambda: bump_versions(keys), using=using)
+
+
+def _versions(kind, ids):
+    keys = {version_key(kind, pk): pk for pk in ids}
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    for key, pk in keys.items():
+        if pk not in versions:
+            version = new_version()
+            # Another request may have started the object's version meanwhile.
+            versions[pk] = version if cache.add(key, version, None) else cache.get(key, version)
+    return versions
+
+
+def _load(load, ids, keys):
+    found = load(ids)
+    cache.set_many({keys[pk]: payload for pk, payload in found.items()}, settings.DETAIL_CACHE['TIMEOUT'])
+    for pk, payload in found.items():
+        local_cache.set(keys[pk], payload)
+    return found
+
+
+def get_details(kind, ids, load):
+    """
+    Return {id: payload} of the ``kind`` objects with the given ids, read
+    through the local and shared caches. ``load(ids)`` serializes the objects
+    found in the database. A payload missing from both caches is recomputed by
+    one request while the others asking for it wait for the result. Without
+    DETAIL_CACHE['ENABLED'] every call loads the objects.
+    """
+    if not settings.DETAIL_CACHE['ENABLED']:
+        return load(ids)
+    versions = _versions(kind, ids)
+    keys = {pk: payload_key(kind, pk, versions[pk]) for pk in ids}
+    found = {}
+    for pk, key in keys.items():
+        payload = local_cache.get(key)
+        if payload is not None:
+            found[pk] = payload
+
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        cached = cache.get_many([keys[pk] for pk in missing])
+        for pk in missing:
+            if keys[pk] in cached:
+                found[pk] = cached[keys[pk]]
+                local_cache.set(keys[pk], found[pk])
+        missing = [pk for pk in missing if pk not in found]
+    if not missing:
+        return found
+
+    lock_timeout = settings.DETAIL_CACHE['LOCK_TIMEOUT']
+    owned = [pk for pk in missing if cache.add(lock_key(keys[pk]), True, lock_timeout)]
+    if owned:
+        try:
+            found.update(_load(load, owned, keys))
+        finally:
+            cache.delete_many([lock_key(keys[pk]) for pk in owned])
+
+    waiting = [pk for pk in missing if pk not in owned]
+    deadline = time.monotonic() + lock_timeout
+    while waiting and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        cached = cache.get_many([keys[pk] for pk in waiting] + [lock_key(keys[pk]) for pk in waiting])
+        for pk in waiting:
+            if keys[pk] in cached:
+                found[pk] = cached[keys[pk]]
+                local_cache.set(keys[pk], found[pk])
+        # Objects that don't exist are never cached: once their lock is
+        # released there is nothing left to wait for.
+        waiting = [pk for pk in waiting if pk not in found and lock_key(keys[pk]) in cached]
+    leftover = [pk for pk in missing if pk not in found and pk not in owned]
+    if leftover:
+        found.update(_load(load, leftover, keys))
+    return found
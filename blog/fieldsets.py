@@ -0,0 +1,72 @@
+from rest_framework.exceptions import ParseError
+
+# Comma-separated field names to output, and to leave out.
+FIELDS_QUERY_PARAM = 'fields'
+EXCLUDE_QUERY_PARAM = 'exclude'
+
+
+def _names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def parse_fieldset(request, available):
+    """
+    Return the names among ``available`` that ``?fields=``/``?exclude=``
+    select, in ``available`` order, or None when neither is given. Unknown
+    names are rejected.
+    """
+    fields = _names(request, FIELDS_QUERY_PARAM)
+    exclude = _names(request, EXCLUDE_QUERY_PARAM) or set()
+    if fields is None and not exclude:
+        return None
+    unknown = ((fields or set()) | exclude) - set(available)
+    if unknown:
+        raise ParseError(f'Unknown fields: {", ".join(sorted(unknown))}.')
+    return [name for name in available if (fields is None or name in fields) and name not in exclude]
+
+
+def trim(item, fieldset, keep=()):
+    """
+    Copy of a serialized ``item`` with only the fields in ``fieldset``, and
+    those in ``keep``, that it has.
+    """
+    return {name: value for name, value in item.items() if name in fieldset or name in keep}
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=``/``?exclude=`` for the list and retrieve actions of a viewset:
+    the serializer outputs only the selected fields and the queryset loads only
+    their columns, plus ``required_columns``.
+    """
+    fieldset_actions = {'list', 'retrieve'}
+    # Read whatever the fieldset: the cursor pagination ordering.
+    required_columns = ['id', 'published_at']
+
+    def get_fieldset(self):
+        if self.action not in self.fieldset_actions:
+            return None
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = parse_fieldset(self.request, list(self.get_serializer_class()().fields))
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            fields = serializer.child.fields if kwargs.get('many') else serializer.fields
+            for name in [name for name in fields if name not in fieldset]:
+                fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            serializer_fields = self.get_serializer_class()().fields
+            sources = [serializer_fields[name].source for name in fieldset]
+            queryset = queryset.only(*dict.fromkeys([*self.required_columns, *sources]))
+        return queryset
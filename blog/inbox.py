@@ -0,0 +1,168 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+
+from .models import Blog, Vlog, Child, FeedEntry
+from .serializers import blog_summary_values_serializer, vlog_values_serializer
+
+logger = logging.getLogger(__name__)
+
+# kind -> (model, serializer of its feed items, the same as the pull feed's)
+INBOX_MODELS = {
+    'blog': (Blog, blog_summary_values_serializer),
+    'vlog': (Vlog, vlog_values_serializer),
+}
+
+# Items or users per INSERT ... SELECT, well under SQLite's parameter limit.
+FANOUT_CHUNK_SIZE = 500
+
+# A single worker runs fan-outs in the order their transactions committed.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feed-fanout')
+
+
+def push_enabled():
+    return settings.FEED_MODE == 'push'
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), FANOUT_CHUNK_SIZE):
+        yield values[start:start + FANOUT_CHUNK_SIZE]
+
+
+def _insert_entries(kind, column, values, using):
+    # Entries for every (parent, published item) pair where one of the parent's
+    # children sees the item: same age group or same gender, as segment_filter().
+    model = INBOX_MODELS[kind][0]
+    sql = (
+        f'INSERT INTO {FeedEntry._meta.db_table} (user_id, kind, item_id, published_at) '
+        f'SELECT DISTINCT child.user_id, %s, item.id, item.published_at '
+        f'FROM {model._meta.db_table} item JOIN {Child._meta.db_table} child '
+        f'ON child.age_group = item.age_group OR child.gender = item.gender '
+        f'WHERE item.status = %s AND {column} IN ({", ".join(["%s"] * len(values))})'
+    )
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, [kind, True, *values])
+        return cursor.rowcount
+
+
+def fan_out(kind, item_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Bring the inbox entries of the given items in line with their current
+    state: one entry per recipient of each published item, none for items
+    unpublished or deleted since. Returns the number of entries written.
+    """
+    written = 0
+    with transaction.atomic(using=using):
+        for chunk in _chunks(item_ids):
+            FeedEntry.objects.using(using).filter(kind=kind, item_id__in=chunk).delete()
+            written += _insert_entries(kind, 'item.id', chunk, using)
+    return written
+
+
+def rebuild_inboxes(user_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Rewrite the inboxes of the given users from the published items their
+    children see. Users without children get an empty inbox, as they read
+    the pull feed. Returns the number of entries written.
+    """
+    written = 0
+    with transaction.atomic(using=using):
+        for chunk in _chunks(user_ids):
+            FeedEntry.objects.using(using).filter(user_id__in=chunk).delete()
+            for kind in INBOX_MODELS:
+                written += _insert_entries(kind, 'child.user_id', chunk, using)
+    return written
+
+
+def _run_in_background(func, args, using):
+    try:
+        func(*args, using=using)
+    except Exception:
+        logger.exception('Feed fan-out %s%r failed; run backfill_feed_inbox to repair the inboxes.', func.__name__, args)
+    finally:
+        close_old_connections()
+
+
+def schedule(func, *args, using=DEFAULT_DB_ALIAS):
+    """
+    Run ``func(*args)`` once the current transaction commits, on the fan-out
+    thread, or right away when FEED_FANOUT_BACKGROUND is off.
+    """
+    if not settings.FEED_FANOUT_BACKGROUND:
+        func(*args, using=using)
+        return
+    transaction.on_commit(lambda: _executor.submit(_run_in_background, func, args, using), using=using)
+
+
+def items_changed(*instances, using=DEFAULT_DB_ALIAS):
+    """
+    In push mode, schedule the fan-out of blogs and vlogs that were published,
+    edited, unpublished or deleted.
+    """
+    if not push_enabled():
+        return
+    ids = defaultdict(set)
+    for instance in instances:
+        kind = 'blog' if isinstance(instance, Blog) else 'vlog'
+        ids[kind].add(instance.pk)
+    for kind, pks in ids.items():
+        schedule(fan_out, kind, sorted(pks), using=using)
+
+
+def children_changed(*user_ids, using=DEFAULT_DB_ALIAS):
+    """
+    In push mode, schedule the rebuild of the inboxes of users whose children
+    changed segment, were added or were removed.
+    """
+    if push_enabled() and user_ids:
+        schedule(rebuild_inboxes, sorted(set(user_ids)), using=using)
+
+
+def load_items(refs):
+    """
+    Serialized feed items of (published_at, kind, item_id) references, keyed by
+    (kind, item_id), with one query per kind. Items no longer published are
+    missing until their fan-out removes the references.
+    """
+    ids = defaultdict(list)
+    for _, kind, pk in refs:
+        ids[kind].append(pk)
+    items = {}
+    for kind, pks in ids.items():
+        model, serializer = INBOX_MODELS[kind]
+        for item in serializer.serialize(model.objects.filter(pk__in=pks, status=True)):
+            items[kind, item['id']] = item
+    return items
+
+
+def _inbox(user):
+    return FeedEntry.objects.filter(user=user)
+
+
+def feed_page(user, paginator, request):
+    """
+    HomeFeedView page of ``user``'s inbox, blogs and vlogs side by side.
+    """
+    entries = _inbox(user)
+    refs = paginator.paginate_inbox(
+        {'blogs': entries.filter(kind='blog'), 'vlogs': entries.filter(kind='vlog')}, request,
+    )
+    items = load_items(chain(*refs.values()))
+    return {
+        name: [items[kind, pk] for _, kind, pk in page if (kind, pk) in items]
+        for name, page in refs.items()
+    }
+
+
+def merged_page(user, paginator, request):
+    """
+    UnifiedHomeFeedView page of ``user``'s inbox.
+    """
+    refs = paginator.paginate_inbox_merged(_inbox(user), request)
+    items = load_items(refs)
+    return {'results': [{'type': kind, **items[kind, pk]} for _, kind, pk in refs if (kind, pk) in items]}
@@ -0,0 +1,47 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from blog.inbox import rebuild_inboxes
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the push-mode feed inboxes (FeedEntry rows) of every user, or of "
+        "the given ones, from the published blogs and vlogs their children see. "
+        "Run it before setting FEED_MODE to 'push', and to repair inboxes after a "
+        "failed background fan-out."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help='User id to rebuild; repeatable.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users per transaction.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        users = User.objects.using(options['database']).order_by('pk')
+        if options['users']:
+            users = users.filter(pk__in=options['users'])
+
+        rebuilt = written = 0
+        last_pk = 0
+        start = time.perf_counter()
+        while True:
+            batch = list(users.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            written += rebuild_inboxes(batch, using=options['database'])
+            rebuilt += len(batch)
+            last_pk = batch[-1]
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'{rebuilt} users rebuilt, {written} entries written')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rebuilt} inboxes with {written} entries in {elapsed:.2f}s, '
+            f'{rebuilt / max(elapsed, 1e-9):.0f} users/s.'
+        ))
@@ -0,0 +1,308 @@
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from blog.inbox import push_enabled, rebuild_inboxes
+from blog.models import Blog, Vlog
+from blog.search import rebuild_index
+from blog.seeding import seed_author, seed_content, seed_parents
+from .load_test import percentile
+
+PASSWORD = 'bench-password'
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API in-process: seed a throwaway test database with users, "
+        "children, blogs and vlogs, drive each endpoint with concurrent clients and "
+        "report throughput, p50/p95/p99 latency and queries per request. Save the "
+        "results with --output and compare two runs, e.g. before and after a "
+        "commit, with --compare."
+    )
+
+    # Scenarios hashing a password on every request; they get --auth-requests.
+    auth_scenarios = ['login', 'register']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Parents to seed.')
+        parser.add_argument('--children', type=int, default=2, help='Children per parent.')
+        parser.add_argument('--blogs', type=int, default=10000)
+        parser.add_argument('--vlogs', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=500, help='Requests per scenario.')
+        parser.add_argument('--auth-requests', type=int, default=20,
+                            help='Requests per login/register scenario, which are bound by password hashing.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario.')
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=self.available_scenarios(),
+                            help='Scenario to run; repeatable. Defaults to all of them.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the data and the request mix.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='Results JSON of an earlier run to compare with.')
+
+    @classmethod
+    def available_scenarios(cls):
+        return [name[len('scenario_'):].replace('_', '-') for name in dir(cls) if name.startswith('scenario_')]
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+        self.random = random.Random(options['seed'])
+        random.seed(options['seed'])
+
+        # A SQLite test database is normally in memory; a file lets the client
+        # threads use their own connections, like server workers would.
+        test_settings = connection.settings_dict['TEST']
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            test_settings['NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            self.seed(options)
+            results = {}
+            for name in options['scenarios'] or self.available_scenarios():
+                count = options['auth_requests'] if name in self.auth_scenarios else options['requests']
+                scenario = getattr(self, 'scenario_' + name.replace('-', '_'))
+                self.run(scenario(options['warmup']), 1)
+                results[name] = self.run(scenario(count), options['concurrency'])
+                self.report(name, results[name], baseline)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'commit': self.commit(),
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'database': connection.vendor,
+                    'options': {
+                        name: options[name] for name in (
+                            'users', 'children', 'blogs', 'vlogs', 'requests', 'auth_requests',
+                            'concurrency', 'warmup', 'seed',
+                        )
+                    },
+                    'results': results,
+                }, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}.')
+
+    def seed(self, options):
+        start = time.perf_counter()
+        self.author = seed_author('bench-author')
+        self.parents = seed_parents(options['users'], options['children'], password=PASSWORD, prefix='bench-parent')
+        if not self.parents:
+            raise CommandError('--users must be positive.')
+        seed_content(options['blogs'], self.author, vlog_rows=options['vlogs'])
+        rebuild_index()
+        if push_enabled():
+            rebuild_inboxes([parent.pk for parent in self.parents])
+        cache.clear()
+
+        self.blog_ids = list(Blog.objects.values_list('id', flat=True))
+        self.vlog_ids = list(Vlog.objects.values_list('id', flat=True))
+        if not self.blog_ids or not self.vlog_ids:
+            raise CommandError('--blogs and --vlogs must be positive.')
+        self.random.shuffle(self.blog_ids)
+        self.headers = {self.author.pk: self.auth(self.author)}
+        for parent in self.parents:
+            self.headers[parent.pk] = self.auth(parent)
+        self.registered = 0
+        self.stdout.write(
+            f'Seeded {len(self.parents)} parents, {len(self.blog_ids)} blogs and {len(self.vlog_ids)} vlogs '
+            f'in {time.perf_counter() - start:.1f}s.'
+        )
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def as_parent(self):
+        return self.headers[self.random.choice(self.parents).pk]
+
+    # Scenarios return a list of (method, path, JSON body or None, headers).
+
+    def scenario_home_feed(self, count):
+        return [('GET', '/api/home-feed/', None, self.as_parent()) for _ in range(count)]
+
+    def scenario_home_feed_unified(self, count):
+        return [('GET', '/api/home-feed/unified/', None, self.as_parent()) for _ in range(count)]
+
+    def scenario_detail(self, count):
+        return [
+            ('GET', f'/api/detail/?vid={self.random.choice(self.vlog_ids)}&bid={self.random.choice(self.blog_ids)}',
+             None, self.as_parent())
+            for _ in range(count)
+        ]
+
+    def scenario_detail_batch(self, count):
+        return [
+            ('GET', '/api/detail/?bid=' + ','.join(map(str, self.random.sample(self.blog_ids, min(20, len(self.blog_ids))))),
+             None, self.as_parent())
+            for _ in range(count)
+        ]
+
+    def scenario_search(self, count):
+        # Seeded titles are "Blog <n>" and "Vlog <n>".
+        return [
+            ('GET', f'/api/search/?q=blog+{self.random.randrange(len(self.blog_ids))}', None, self.as_parent())
+            for _ in range(count)
+        ]
+
+    def scenario_children_list(self, count):
+        return [('GET', '/api/children/', None, self.as_parent()) for _ in range(count)]
+
+    def scenario_blogs_list(self, count):
+        return [('GET', '/api/blogs/', None, self.headers[self.author.pk]) for _ in range(count)]
+
+    def scenario_vlogs_list(self, count):
+        return [('GET', '/api/vlogs/', None, self.headers[self.author.pk]) for _ in range(count)]
+
+    def scenario_blogs_create(self, count):
+        return [
+            ('POST', '/api/blogs/', {'title': f'Bench {i}', 'content': 'lorem ipsum ' * 100, 'status': True},
+             self.headers[self.author.pk])
+            for i in range(count)
+        ]
+
+    def scenario_blogs_retrieve(self, count):
+        return [
+            ('GET', f'/api/blogs/{self.random.choice(self.blog_ids)}/', None, self.headers[self.author.pk])
+            for _ in range(count)
+        ]
+
+    def scenario_blogs_update(self, count):
+        return [
+            ('PATCH', f'/api/blogs/{self.random.choice(self.blog_ids)}/', {'title': f'Updated {i}'},
+             self.headers[self.author.pk])
+            for i in range(count)
+        ]
+
+    def scenario_blogs_delete(self, count):
+        # Deleted ids are dropped, so later scenarios only pick existing blogs.
+        deleted, self.blog_ids = self.blog_ids[:count], self.blog_ids[count:]
+        return [('DELETE', f'/api/blogs/{pk}/', None, self.headers[self.author.pk]) for pk in deleted]
+
+    def scenario_login(self, count):
+        return [
+            ('POST', '/api/login/', {'username': self.random.choice(self.parents).username, 'password': PASSWORD}, {})
+            for _ in range(count)
+        ]
+
+    def scenario_refresh(self, count):
+        tokens = [str(RefreshToken.for_user(self.random.choice(self.parents))) for _ in range(count)]
+        return [('POST', '/api/token/refresh/', {'refresh': token}, {}) for token in tokens]
+
+    def scenario_register(self, count):
+        self.registered += count
+        return [
+            ('POST', '/api/register/',
+             {'username': f'bench-new-{self.registered - i}', 'email': 'new@example.com', 'password': PASSWORD}, {})
+            for i in range(count)
+        ]
+
+    def run(self, requests, concurrency):
+        """
+        Send ``requests`` from ``concurrency`` threads, each with its own client
+        and database connection. Returns the latency, error and query statistics.
+        """
+        pending = iter(requests)
+        lock = threading.Lock()
+        samples = []
+
+        def worker():
+            client = Client(raise_request_exception=False)
+            counter = QueryCounter()
+            local = []
+            try:
+                with connection.execute_wrapper(counter):
+                    while True:
+                        with lock:
+                            request = next(pending, None)
+                        if request is None:
+                            break
+                        method, path, body, headers = request
+                        counter.count = 0
+                        start = time.perf_counter()
+                        response = client.generic(
+                            method, path, json.dumps(body) if body is not None else '',
+                            content_type='application/json', **headers,
+                        )
+                        local.append((time.perf_counter() - start, response.status_code, counter.count))
+            finally:
+                connections.close_all()
+            with lock:
+                samples.extend(local)
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for latency, _, _ in samples]
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for _, code, _ in samples if code >= 400),
+            'throughput': len(samples) / elapsed,
+            'mean_ms': statistics.mean(latencies) * 1000,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'queries_per_request': statistics.mean(queries for _, _, queries in samples),
+        }
+
+    def report(self, name, result, baseline):
+        line = (
+            f'{name:<20} {result["throughput"]:>8,.1f} req/s  p50 {result["p50_ms"]:>7.1f} ms  '
+            f'p95 {result["p95_ms"]:>7.1f} ms  p99 {result["p99_ms"]:>7.1f} ms  '
+            f'{result["queries_per_request"]:>5.1f} queries  errors {result["errors"]}'
+        )
+        previous = (baseline or {}).get('results', {}).get(name)
+        if previous:
+            line += (
+                f'  | vs {(baseline.get("commit") or "baseline")[:8]}: '
+                f'throughput {self.change(previous["throughput"], result["throughput"])}, '
+                f'p95 {self.change(previous["p95_ms"], result["p95_ms"])}, '
+                f'queries {result["queries_per_request"] - previous["queries_per_request"]:+.1f}'
+            )
+        self.stdout.write(line)
+
+    def change(self, before, after):
+        return f'{(after - before) / before * 100:+.0f}%' if before else 'n/a'
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from blog.cache import ALL_SEGMENT, feed_queryset
+from blog.compression import brotli, compress
+from blog.models import Blog, Vlog
+from blog.renderers import MessagePackRenderer, ORJSONRenderer, orjson
+from blog.seeding import Rollback, seed_author, seed_content
+from blog.serializers import blog_summary_values_serializer, blog_values_serializer, vlog_values_serializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare render time and response size of the JSON (DRF and orjson) and "
+        "MessagePack renderers on a home feed page, uncompressed and with gzip and "
+        "brotli. Renderers and codings whose library isn't installed are skipped. "
+        "Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20, help='Blogs and vlogs on the page.')
+        parser.add_argument('--content-length', type=int, default=2000, help='Characters of content per blog.')
+        parser.add_argument('--full-content', action='store_true',
+                            help='Render blogs with their content rather than the feed summaries.')
+        parser.add_argument('--repeat', type=int, default=200, help='Timed runs per measurement; the best is kept.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                author = seed_author('bench-renderers-seed')
+                seed_content(options['page_size'], author, published_ratio=1, content_length=options['content_length'])
+                page = self.feed_page(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        renderers = [('DRF JSON', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', ORJSONRenderer()))
+        if MessagePackRenderer.available:
+            renderers.append(('MessagePack', MessagePackRenderer()))
+        codings = ['gzip'] + (['br'] if brotli is not None else [])
+
+        self.stdout.write(
+            f'Home feed page of {len(page["blogs"])} blogs and {len(page["vlogs"])} vlogs'
+            f'{" with full content" if options["full_content"] else ""}:'
+        )
+        baseline = None
+        for name, renderer in renderers:
+            body, render_time = self.best(lambda: renderer.render(page), options['repeat'])
+            baseline = baseline or render_time
+            line = (
+                f'{name:<12} render {render_time * 1000:>7.3f} ms (x{baseline / render_time:.1f})  '
+                f'{len(body):>8,} bytes'
+            )
+            for coding in codings:
+                compressed, compress_time = self.best(lambda: compress(body, coding), options['repeat'])
+                line += f'  | {coding} {len(compressed):>7,} bytes {compress_time * 1000:>6.3f} ms'
+            self.stdout.write(line)
+
+    def feed_page(self, options):
+        blogs_serializer = blog_values_serializer if options['full_content'] else blog_summary_values_serializer
+        size = options['page_size']
+        return {
+            'next': 'http://testserver/api/home-feed/?cursor=eyJibG9ncyI6IFsiMjAyNi0wMS0wMVQwMDowMDowMCswMDowMCJdfQ%3D%3D',
+            'blogs': blogs_serializer.serialize(feed_queryset(Blog, [ALL_SEGMENT])[:size]),
+            'vlogs': vlog_values_serializer.serialize(feed_queryset(Vlog, [ALL_SEGMENT])[:size]),
+        }
+
+    def best(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run()
+            timings.append(time.perf_counter() - start)
+        return result, min(timings)
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from blog.models import Blog, Vlog
+from blog.seeding import Rollback, seed_author, seed_content
+from blog.serializers import (
+    BlogSerializer, VlogSerializer, blog_values_serializer, vlog_values_serializer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of the ModelSerializer and values() read paths for blogs "
+        "and vlogs, and check both render to identical JSON. Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per path; the best is kept.')
+
+    def handle(self, *args, **options):
+        paths = [
+            (Blog, BlogSerializer, blog_values_serializer),
+            (Vlog, VlogSerializer, vlog_values_serializer),
+        ]
+        try:
+            with transaction.atomic():
+                author = seed_author('bench-serializers-seed')
+                seeded = 0
+                for rows in sorted(options['rows']):
+                    seed_content(rows - seeded, author, published_ratio=1)
+                    seeded = rows
+                    for model, serializer_class, values_serializer in paths:
+                        queryset = model.objects.filter(author=author)
+                        slow, slow_time = self.best(
+                            lambda: serializer_class(queryset, many=True).data, options['repeat'])
+                        fast, fast_time = self.best(
+                            lambda: values_serializer.serialize(queryset), options['repeat'])
+                        if JSONRenderer().render(slow) != JSONRenderer().render(fast):
+                            raise CommandError(f'{model.__name__} values() output differs from {serializer_class.__name__}.')
+                        self.stdout.write(
+                            f'{model.__name__:<5} {rows:>7} rows: '
+                            f'{serializer_class.__name__} {rows / slow_time:>10,.0f} rows/s  '
+                            f'values() {rows / fast_time:>10,.0f} rows/s  '
+                            f'x{slow_time / fast_time:.1f}'
+                        )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def best(self, serialize, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = serialize()
+            timings.append(time.perf_counter() - start)
+        return data, min(timings)
@@ -0,0 +1,77 @@
+import itertools
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from blog.cache import ALL_SEGMENT, segment_filter
+from blog.models import Blog, Vlog
+from blog.seeding import Rollback, seed_author, seed_content
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed Blog/Vlog rows and print EXPLAIN plans and timings of the home feed "
+        "queries without and with the feed indexes. Runs in a transaction that is "
+        "rolled back, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows to seed per model.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query.')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        self.using = options['database']
+        self.repeat = options['repeat']
+        try:
+            with transaction.atomic(using=self.using):
+                self.seed(options['rows'])
+                self.execute_index_sql('remove_sql')
+                self.analyze()
+                self.report('without feed indexes')
+
+                self.execute_index_sql('create_sql')
+                self.analyze()
+                self.report('with feed indexes')
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        seed_content(rows, seed_author('explain-feed-seed', self.using), self.using)
+        self.stdout.write(f'Seeded {rows} rows per model on {connections[self.using].vendor}.')
+
+    def execute_index_sql(self, method):
+        # The schema editor context can't be entered inside a transaction on
+        # SQLite, so only use it to generate the DROP/CREATE INDEX statements.
+        connection = connections[self.using]
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model in (Blog, Vlog):
+                for index in model._meta.indexes:
+                    cursor.execute(str(getattr(index, method)(model, schema_editor)))
+
+    def analyze(self):
+        with connections[self.using].cursor() as cursor:
+            for model in (Blog, Vlog):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def report(self, label):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {label} =='))
+        for segment, page in itertools.product((('1-3', 'female'), ALL_SEGMENT), (False, True)):
+            for model in (Blog, Vlog):
+                queryset = model.objects.using(self.using).filter(segment_filter(segment))
+                if page:
+                    queryset = queryset[:settings.PAGE_SIZE]
+                timings = []
+                for _ in range(self.repeat):
+                    start = time.perf_counter()
+                    count = len(queryset.all())
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f'\n{model.__name__} segment={segment}{" first page" if page else ""}: {count} rows, '
+                    f'best {min(timings) * 1000:.1f} ms of {self.repeat}'
+                )
+                self.stdout.write(queryset.explain())
@@ -0,0 +1,172 @@
+import csv
+import json
+import os
+import re
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.validators import ProhibitSurrogateCharactersValidator
+
+from blog.cache import invalidate_items
+from blog.inbox import items_changed
+from blog.models import Blog, Vlog
+from blog.search import index_items
+from blog.serializers import BlogSerializer, VlogSerializer
+
+SURROGATES = re.compile('[\ud800-\udfff]')
+
+
+class SurrogateCharactersValidator(ProhibitSurrogateCharactersValidator):
+    """
+    The CharField rule rejecting surrogate characters, checked with a regex
+    instead of a Python loop over every character of long contents.
+    """
+
+    def __call__(self, value):
+        match = SURROGATES.search(str(value))
+        if match:
+            raise ValidationError(self.message.format(code_point=ord(match.group())), code=self.code)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import blogs or vlogs from a JSONL or CSV file. Rows are streamed, checked "
+        "with the API serializers' field rules and inserted with bulk_create, one "
+        "transaction per batch. A checkpoint file records the rows committed so far, "
+        "so an interrupted import continues where it stopped with --resume."
+    )
+
+    # --model -> (model, serializer validating the rows)
+    models = {
+        'blog': (Blog, BlogSerializer),
+        'vlog': (Vlog, VlogSerializer),
+    }
+    formats = ['jsonl', 'csv']
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL (one object per line) or CSV (with a header row) file.')
+        parser.add_argument('--model', choices=list(self.models), required=True)
+        parser.add_argument('--author', required=True, help='Username the imported content belongs to.')
+        parser.add_argument('--format', choices=self.formats, help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=settings.BULK_BATCH_SIZE)
+        parser.add_argument('--checkpoint', help='Checkpoint file. Defaults to <path>.checkpoint.')
+        parser.add_argument('--resume', action='store_true', help='Skip the rows committed by a previous run.')
+        parser.add_argument('--strict', action='store_true', help='Stop at the first invalid row instead of skipping it.')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in self.formats:
+            raise CommandError(f'Cannot tell the format of {path}; pass --format jsonl or --format csv.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        self.using = options['database']
+        self.model, serializer_class = self.models[options['model']]
+        # One serializer validates every row, so its fields are built once.
+        self.serializer = serializer_class()
+        for field in self.serializer.fields.values():
+            field.validators = [
+                SurrogateCharactersValidator() if isinstance(validator, ProhibitSurrogateCharactersValidator) else validator
+                for validator in field.validators
+            ]
+        try:
+            self.author = User.objects.db_manager(self.using).get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["author"]}.')
+        self.checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+
+        done = self.read_checkpoint(path, options['model']) if options['resume'] else 0
+        if done:
+            self.stdout.write(f'Resuming after {done} rows.')
+        records = (record for record in self.read_records(path, fmt) if record[0] > done)
+
+        imported = skipped = 0
+        start = time.perf_counter()
+        while True:
+            batch = list(islice(records, options['batch_size']))
+            if not batch:
+                break
+            instances = []
+            for number, record, error in batch:
+                if error is None:
+                    try:
+                        instances.append(self.build_instance(record))
+                        continue
+                    except ValidationError as exc:
+                        error = exc.detail
+                if options['strict']:
+                    raise CommandError(f'Row {number}: {json.dumps(error)}')
+                self.stderr.write(f'Row {number} skipped: {json.dumps(error)}')
+                skipped += 1
+
+            with transaction.atomic(using=self.using):
+                self.model.objects.using(self.using).bulk_create(instances)
+                index_items(*instances, using=self.using)
+                items_changed(*instances, using=self.using)
+            done = batch[-1][0]
+            self.write_checkpoint(path, options['model'], done)
+            invalidate_items(*instances)
+
+            imported += len(instances)
+            # With DEBUG on, the query log would otherwise keep every batch's SQL.
+            reset_queries()
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'{done} rows read, {imported} imported, {self.rate(imported, start)}')
+
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} {self.model._meta.verbose_name_plural} ({skipped} rows skipped) '
+            f'in {time.perf_counter() - start:.2f}s, {self.rate(imported, start)}.'
+        ))
+
+    def rate(self, rows, start):
+        return f'{rows / max(time.perf_counter() - start, 1e-9):.0f} rows/s'
+
+    def read_records(self, path, fmt):
+        """
+        Yield (row number, record, parse error) for every row of the file.
+        """
+        with open(path, newline='', encoding='utf-8') as file:
+            if fmt == 'jsonl':
+                for number, line in enumerate(file, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield number, json.loads(line), None
+                    except ValueError as exc:
+                        yield number, None, f'Invalid JSON: {exc}'
+            else:
+                for number, row in enumerate(csv.DictReader(file), 1):
+                    # An empty cell stands for a missing value, so model defaults apply.
+                    yield number, {name: value for name, value in row.items() if value != ''}, None
+
+    def build_instance(self, record):
+        instance = self.model(**self.serializer.run_validation(record), author=self.author)
+        if isinstance(instance, Blog):
+            instance.update_summary()
+        return instance
+
+    def read_checkpoint(self, path, model):
+        try:
+            with open(self.checkpoint) as file:
+                checkpoint = json.load(file)
+        except FileNotFoundError:
+            return 0
+        if checkpoint['path'] != os.path.abspath(path) or checkpoint['model'] != model:
+            raise CommandError(f'{self.checkpoint} belongs to an import of another file or model.')
+        return checkpoint['rows']
+
+    def write_checkpoint(self, path, model, rows):
+        # Written next to the checkpoint and renamed over it, so an interruption
+        # never leaves a truncated checkpoint behind.
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump({'path': os.path.abspath(path), 'model': model, 'rows': rows}, file)
+        os.replace(temporary, self.checkpoint)
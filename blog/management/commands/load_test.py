@@ -0,0 +1,67 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive endpoints of a running server with concurrent clients and report "
+        "p50/p99 latency and requests/sec, e.g. to compare the WSGI views with "
+        "their async variants under gunicorn and an ASGI server at the same "
+        "worker count."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help='e.g. http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Endpoint to drive; repeatable. Defaults to the sync and async home feeds.')
+        parser.add_argument('--username', required=True, help='User the requests authenticate as.')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per path.')
+        parser.add_argument('--concurrency', type=int, default=32)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist.")
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        paths = options['paths'] or ['/api/home-feed/', '/api/async/home-feed/']
+
+        for path in paths:
+            url = options['base_url'].rstrip('/') + path
+            self.fetch(url, headers)  # warm up
+            start = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                results = list(executor.map(lambda _: self.fetch(url, headers), range(options['requests'])))
+            elapsed = time.perf_counter() - start
+
+            latencies = [latency for latency, _ in results]
+            errors = sum(1 for _, code in results if code >= 400)
+            self.stdout.write(
+                f'{path}: {len(results) / elapsed:,.0f} req/s  '
+                f'p50 {percentile(latencies, 0.50) * 1000:.1f} ms  '
+                f'p99 {percentile(latencies, 0.99) * 1000:.1f} ms  '
+                f'mean {statistics.mean(latencies) * 1000:.1f} ms  '
+                f'errors {errors}'
+            )
+
+    def fetch(self, url, headers):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+                response.read()
+                code = response.status
+        except urllib.error.HTTPError as exc:
+            code = exc.code
+        return time.perf_counter() - start, code
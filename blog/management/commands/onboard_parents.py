@@ -0,0 +1,67 @@
+import json
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+
+from blog.onboarding import create_parents, password_hashing_pool, validate_parents
+
+
+class Command(BaseCommand):
+    help = (
+        "Create parent accounts from a JSONL file, one /api/register/ payload per "
+        "line with an optional \"children\" list. Users, profiles and children are "
+        "inserted with bulk_create, one transaction per batch, and passwords are "
+        "hashed on a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, help='Password hashing processes. Defaults to one per CPU.')
+        parser.add_argument('--strict', action='store_true', help='Stop at the first invalid record instead of skipping it.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        created = children = skipped = 0
+        start = time.perf_counter()
+        with open(options['path'], encoding='utf-8') as file, password_hashing_pool(options['workers']) as pool:
+            lines = ((number, line) for number, line in enumerate(file, 1) if line.strip())
+            while True:
+                batch = list(islice(lines, options['batch_size']))
+                if not batch:
+                    break
+                records, numbers = [], []
+                for number, line in batch:
+                    try:
+                        records.append(json.loads(line))
+                        numbers.append(number)
+                    except ValueError as exc:
+                        self.reject(number, f'Invalid JSON: {exc}', options['strict'])
+                        skipped += 1
+                validated, errors = validate_parents(records)
+                for error in errors:
+                    self.reject(numbers[error['index']], json.dumps(error['errors']), options['strict'])
+                skipped += len(errors)
+
+                create_parents(validated, pool)
+                created += len(validated)
+                children += sum(len(data.get('children', [])) for data in validated)
+                reset_queries()
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f'{created} parents created, {self.rate(created, start)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} parents with {children} children ({skipped} records skipped) '
+            f'in {time.perf_counter() - start:.2f}s, {self.rate(created, start)}.'
+        ))
+
+    def reject(self, number, error, strict):
+        if strict:
+            raise CommandError(f'Line {number}: {error}')
+        self.stderr.write(f'Line {number} skipped: {error}')
+
+    def rate(self, users, start):
+        return f'{users / max(time.perf_counter() - start, 1e-9):.0f} users/s'
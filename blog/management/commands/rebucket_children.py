@@ -0,0 +1,52 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.authentication import invalidate_user_context
+from blog.inbox import children_changed
+from blog.models import Child
+
+
+class Command(BaseCommand):
+    help = (
+        "Move children whose next_age_group_on has come to their current age bucket, "
+        "in bulk, invalidate their parents' cached contexts and, in push feed mode, "
+        "rebuild their feed inboxes. Run it daily, e.g. from cron, shortly after midnight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Day to rebucket for (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        today = options['date'] or date.today()
+        due = (
+            Child.objects.filter(next_age_group_on__lte=today)
+            .only('id', 'user_id', 'date_of_birth', 'age_group', 'next_age_group_on')
+            .order_by('pk')
+        )
+        moved = 0
+        last_pk = 0
+        start = time.perf_counter()
+        while True:
+            children = list(due.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not children:
+                break
+            for child in children:
+                child.update_age_group(today)
+            user_ids = {child.user_id for child in children}
+            with transaction.atomic():
+                Child.objects.bulk_update(children, ['age_group', 'next_age_group_on'])
+                children_changed(*user_ids)
+            for user_id in user_ids:
+                invalidate_user_context(user_id)
+            moved += len(children)
+            last_pk = children[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebucketed {moved} children in {time.perf_counter() - start:.2f}s.'
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the full-text search index from the published blogs and vlogs. "
+        "Saves keep the index in sync; use this after writes that bypass model "
+        "signals, such as raw SQL or QuerySet.update()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if get_backend(using) is None:
+            raise CommandError('Full-text search needs a SQLite or PostgreSQL database.')
+        start = time.perf_counter()
+        with transaction.atomic(using=using):
+            indexed = rebuild_index(using=using, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} items in {elapsed:.2f}s.'))
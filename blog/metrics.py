@@ -0,0 +1,409 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Header a staff user sends to have every query of the request logged.
+PROFILE_HEADER = 'X-Profile-Queries'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+class Histogram:
+    """
+    Prometheus histogram: cumulative counts per upper bound, sum and count,
+    kept per combination of label values.
+    """
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {labels: [list(counts), total, count] for labels, (counts, total, count) in self.series.items()}
+
+    def collect(self, others=()):
+        """
+        Exposition lines of this histogram, with the series of ``others``
+        ((labels, counts, sum, count) lists of other processes) added in.
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        merged = self.snapshot()
+        for other in others:
+            for labels, counts, total, count in other:
+                series = merged.setdefault(tuple(labels), [[0] * (len(self.buckets) + 1), 0.0, 0])
+                series[0] = [mine + theirs for mine, theirs in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+        for labels, (counts, total, count) in sorted(merged.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, labels)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, labels)} {count}')
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+
+class Registry:
+    def __init__(self, *metrics):
+        self.metrics = {metric.name: metric for metric in metrics}
+
+    def __getitem__(self, name):
+        return self.metrics[name]
+
+    def dump(self):
+        return {
+            name: [[list(labels), *series] for labels, series in metric.snapshot().items()]
+            for name, metric in self.metrics.items()
+        }
+
+    def render(self, others=()):
+        """
+        Exposition text of the metrics, adding up those of ``others``
+        (dump() results of other processes).
+        """
+        return '\n'.join(
+            line
+            for name, metric in self.metrics.items()
+            for line in metric.collect([other.get(name, ()) for other in others])
+        ) + '\n'
+
+    def clear(self):
+        for metric in self.metrics.values():
+            metric.clear()
+
+
+registry = Registry(
+    Histogram('http_request_duration_seconds', 'Time to produce a response, by view.',
+              ('view', 'method', 'status'), LATENCY_BUCKETS),
+    Histogram('http_request_db_queries', 'Database queries per request, by view.',
+              ('view',), QUERY_COUNT_BUCKETS),
+    Histogram('http_request_db_duration_seconds', 'Time spent in database queries per request, by view.',
+              ('view',), LATENCY_BUCKETS),
+    Histogram('http_request_serialization_duration_seconds',
+              'Time spent turning rows and instances into response data, queries excluded, by view.',
+              ('view',), LATENCY_BUCKETS),
+    Histogram('http_request_authentication_duration_seconds',
+              'Time spent authenticating the request, queries excluded, by view.',
+              ('view',), LATENCY_BUCKETS),
+    Histogram('http_response_render_duration_seconds',
+              'Time spent encoding the response data (JSON, MessagePack) after the view returned, by view.',
+              ('view',), LATENCY_BUCKETS),
+    Histogram('http_response_size_bytes', 'Size of non-streaming response bodies, by view.',
+              ('view',), SIZE_BUCKETS),
+)
+
+
+class ProcessSnapshots:
+    """
+    Metrics of all the worker processes sharing METRICS['MULTIPROCESS_DIR'].
+    Each process writes its registry to a file of its own there, at most
+    METRICS['FLUSH_SECONDS'] after recording a request and when it exits, and
+    /metrics adds the files of the other processes to the metrics of the one
+    answering. Files of exited workers are kept so the totals never go down.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.lock = threading.Lock()
+        self.changes = threading.Event()
+        self.pid = None
+        self.filename = None
+
+    @property
+    def directory(self):
+        return settings.METRICS['MULTIPROCESS_DIR']
+
+    def changed(self):
+        if self.directory is None:
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                # First change in this process, or in a worker forked from it:
+                # the writer thread doesn't survive the fork.
+                if self.pid is None:
+                    atexit.register(self.write)
+                self.pid = os.getpid()
+                self.filename = f'{self.pid}-{uuid.uuid4().hex}.json'
+                threading.Thread(target=self.run, args=(self.pid,), daemon=True).start()
+        self.changes.set()
+
+    def run(self, pid):
+        while self.pid == pid:
+            self.changes.wait()
+            time.sleep(settings.METRICS['FLUSH_SECONDS'])
+            self.changes.clear()
+            try:
+                self.write()
+            except OSError:
+                logger.exception('Writing the metrics of process %s failed', pid)
+
+    def write(self):
+        if self.directory is None or self.pid != os.getpid():
+            return
+        path = os.path.join(self.directory, self.filename)
+        # Written aside and moved into place, so readers never see a partial file.
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.registry.dump(), file)
+        os.replace(f'{path}.tmp', path)
+
+    def others(self):
+        """
+        The last written metrics of every other process.
+        """
+        if self.directory is None:
+            return []
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or (name == self.filename and self.pid == os.getpid()):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+snapshots = ProcessSnapshots(registry)
+
+# Profile of the request being handled, for the code timing its phases.
+_current_profile = ContextVar('metrics_profile', default=None)
+
+
+@contextmanager
+def timing(phase):
+    """
+    Count the time spent in the block, less its database queries, towards
+    ``phase`` ('serialization' or 'authentication') of the current request.
+    Blocks nested in a timed block count towards the outer one only.
+    """
+    profile = _current_profile.get()
+    if profile is None or profile.phase is not None:
+        yield
+        return
+    profile.phase = phase
+    start, query_time = time.perf_counter(), profile.query_time
+    try:
+        yield
+    finally:
+        profile.phase = None
+        profile.add_time(phase, time.perf_counter() - start - (profile.query_time - query_time))
+
+
+def timed_converter(phase, convert):
+    """
+    Wrap the per-row function ``convert`` to count its time towards ``phase``
+    of the current request, without the overhead of timing() on every row.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return convert
+
+    def timed(row):
+        if profile.phase is not None:
+            return convert(row)
+        start = time.perf_counter()
+        try:
+            return convert(row)
+        finally:
+            profile.add_time(phase, time.perf_counter() - start)
+    return timed
+
+
+def view_label(request):
+    """
+    Name of the view that handled ``request``: the class name for DRF views,
+    followed by the action for viewsets, e.g. ``BlogViewSet.list``.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    if view_class is None:
+        return match.view_name or match._func_path
+    action = (getattr(match.func, 'actions', None) or {}).get(request.method.lower())
+    return f'{view_class.__name__}.{action}' if action else view_class.__name__
+
+
+class RequestProfile:
+    """
+    Database, serialization, authentication and rendering timings of one request.
+    """
+
+    def __init__(self, request):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.render_time = 0.0
+        self.render_start = None
+        # Time of the phases entered, by phase, and the one being timed.
+        self.phase_time = {}
+        self.phase = None
+        # (duration, sql) of the queries kept for the slow query log.
+        self.logged = []
+        self.slow_threshold = settings.METRICS['SLOW_QUERY_MS']
+        self.profile_requested = PROFILE_HEADER in request.headers
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.query_time += duration
+            if self.profile_requested or self.is_slow(duration):
+                self.logged.append((duration, sql))
+
+    def add_time(self, phase, duration):
+        self.phase_time[phase] = self.phase_time.get(phase, 0.0) + duration
+
+    def is_slow(self, duration):
+        return self.slow_threshold is not None and duration * 1000 >= self.slow_threshold
+
+    def recording(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    def render_started(self):
+        self.render_start = time.perf_counter()
+
+    def rendered(self, response):
+        self.render_time = time.perf_counter() - self.render_start
+
+    def finish(self, request, response):
+        duration = time.perf_counter() - self.start
+        view = view_label(request)
+        registry['http_request_duration_seconds'].observe((view, request.method, str(response.status_code)), duration)
+        registry['http_request_db_queries'].observe((view,), self.queries)
+        registry['http_request_db_duration_seconds'].observe((view,), self.query_time)
+        for phase, phase_time in self.phase_time.items():
+            registry[f'http_request_{phase}_duration_seconds'].observe((view,), phase_time)
+        if self.render_start is not None:
+            registry['http_response_render_duration_seconds'].observe((view,), self.render_time)
+        if not response.streaming:
+            registry['http_response_size_bytes'].observe((view,), len(response.content))
+        snapshots.changed()
+        self.log_queries(request, view)
+
+    def log_queries(self, request, view):
+        # The profile header only counts from staff users; request.user is the
+        # one DRF authenticated by now.
+        user = getattr(request, 'user', None)
+        profiled = self.profile_requested and user is not None and user.is_staff
+        for duration, sql in self.logged:
+            if profiled or self.is_slow(duration):
+                logger.warning('%s %s: %.1f ms: %s', view, request.path, duration * 1000, sql)
+
+
+class MetricsMiddleware:
+    """
+    Record per-view latency, database query count and time, serialization,
+    authentication and rendering time and response size for the /metrics
+    endpoint. Queries are counted on every configured connection of the thread
+    handling the request, so queries that async views run in worker threads
+    aren't included. Streamed bodies are produced after the request is
+    recorded, so neither is their serialization.
+
+    Queries slower than METRICS['SLOW_QUERY_MS'] are logged, as are all the
+    queries of a request carrying the X-Profile-Queries header from a staff user.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request._metrics_profile = profile = RequestProfile(request)
+        token = _current_profile.set(profile)
+        try:
+            with profile.recording():
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        profile.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        request._metrics_profile = profile = RequestProfile(request)
+        token = _current_profile.set(profile)
+        try:
+            with profile.recording():
+                response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        profile.finish(request, response)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after the template response hooks,
+        # of which this one runs last as the middleware comes first.
+        profile = request._metrics_profile
+        profile.render_started()
+        response.add_post_render_callback(profile.rendered)
+        return response
+
+
+def metrics_view(request):
+    """
+    Metrics in the Prometheus text exposition format: those of this process,
+    plus those of the other workers when METRICS['MULTIPROCESS_DIR'] is set.
+    """
+    token = settings.METRICS['TOKEN']
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(snapshots.others()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(condition=models.Q(('status', True)), fields=['-published_at', '-id'], name='blog_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(condition=models.Q(('status', True)), fields=['age_group', '-published_at', '-id'], name='blog_age_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(condition=models.Q(('status', True)), fields=['gender', '-published_at', '-id'], name='blog_gender_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vlog',
+            index=models.Index(condition=models.Q(('status', True)), fields=['-published_at', '-id'], name='vlog_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vlog',
+            index=models.Index(condition=models.Q(('status', True)), fields=['age_group', '-published_at', '-id'], name='vlog_age_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vlog',
+            index=models.Index(condition=models.Q(('status', True)), fields=['gender', '-published_at', '-id'], name='vlog_gender_published_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:42
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def populate_summaries(apps, schema_editor):
+    Blog = apps.get_model('blog', 'Blog')
+    batch = []
+    for blog in Blog.objects.only('content').iterator(chunk_size=1000):
+        words = blog.content.split()
+        blog.excerpt = Truncator(' '.join(words)).chars(280)
+        blog.word_count = len(words)
+        batch.append(blog)
+        if len(batch) == 1000:
+            Blog.objects.bulk_update(batch, ['excerpt', 'word_count'])
+            batch = []
+    Blog.objects.bulk_update(batch, ['excerpt', 'word_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=280),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
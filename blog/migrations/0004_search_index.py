@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Document ids fold the kind into the item id: id * 2 for blogs, id * 2 + 1
+# for vlogs (see blog.search.document_id).
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE blog_search USING fts5("
+    "kind UNINDEXED, age_group UNINDEXED, gender UNINDEXED, title, body, "
+    "tokenize = 'porter unicode61')",
+    "INSERT INTO blog_search (rowid, kind, age_group, gender, title, body) "
+    "SELECT id * 2, 'blog', age_group, gender, title, content FROM blog_blog WHERE status",
+    "INSERT INTO blog_search (rowid, kind, age_group, gender, title, body) "
+    "SELECT id * 2 + 1, 'vlog', age_group, gender, title, '' FROM blog_vlog WHERE status",
+]
+
+POSTGRESQL_CREATE = [
+    "CREATE TABLE blog_search ("
+    "id bigint PRIMARY KEY, kind varchar(4) NOT NULL, age_group varchar(5) NOT NULL, "
+    "gender varchar(10) NOT NULL, document tsvector NOT NULL)",
+    "INSERT INTO blog_search (id, kind, age_group, gender, document) "
+    "SELECT id * 2, 'blog', age_group, gender, "
+    "setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', content), 'B') "
+    "FROM blog_blog WHERE status",
+    "INSERT INTO blog_search (id, kind, age_group, gender, document) "
+    "SELECT id * 2 + 1, 'vlog', age_group, gender, setweight(to_tsvector('english', title), 'A') "
+    "FROM blog_vlog WHERE status",
+    "CREATE INDEX blog_search_document_idx ON blog_search USING GIN (document)",
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_CREATE,
+        'postgresql': POSTGRESQL_CREATE,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE blog_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_blog_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.13 on 2026-10-18 11:19
+
+from datetime import date, timedelta
+
+from django.db import migrations, models
+
+AGE_BUCKET_LIMITS = [(1, '0-1'), (3, '1-3'), (7, '3-7'), (10, '7-10')]
+
+
+def populate_age_groups(apps, schema_editor):
+    Child = apps.get_model('blog', 'Child')
+    today = date.today()
+    batch = []
+    for child in Child.objects.only('date_of_birth').iterator(chunk_size=1000):
+        age = (today - child.date_of_birth).days // 365
+        child.age_group, child.next_age_group_on = 'all', None
+        for limit, age_group in AGE_BUCKET_LIMITS:
+            if age <= limit:
+                child.age_group = age_group
+                child.next_age_group_on = child.date_of_birth + timedelta(days=365 * (limit + 1))
+                break
+        batch.append(child)
+        if len(batch) == 1000:
+            Child.objects.bulk_update(batch, ['age_group', 'next_age_group_on'])
+            batch = []
+    Child.objects.bulk_update(batch, ['age_group', 'next_age_group_on'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='child',
+            name='age_group',
+            field=models.CharField(choices=[('all', 'All'), ('0-1', '0-1'), ('1-3', '1-3'), ('3-7', '3-7'), ('7-10', '7-10')], default='all', editable=False, max_length=5),
+        ),
+        migrations.AddField(
+            model_name='child',
+            name='next_age_group_on',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(fields=['next_age_group_on'], name='child_next_age_group_idx'),
+        ),
+        migrations.RunPython(populate_age_groups, migrations.RunPython.noop),
+    ]
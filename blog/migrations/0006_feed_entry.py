@@ -0,0 +1,46 @@
+# Generated by Django 4.2.13 on 2026-10-18 11:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0005_child_age_group'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('blog', 'Blog'), ('vlog', 'Vlog')], max_length=4)),
+                ('item_id', models.BigIntegerField()),
+                ('published_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(fields=['age_group', 'user'], name='child_age_group_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(fields=['gender', 'user'], name='child_gender_user_idx'),
+        ),
+        migrations.AddField(
+            model_name='feedentry',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-published_at', '-kind', '-item_id'], name='feedentry_user_feed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'item_id', 'user'), name='feedentry_item_user_unique'),
+        ),
+    ]
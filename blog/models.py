@@ -1,6 +1,10 @@
+from datetime import date, timedelta
+
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils.text import Truncator
 
 # UserProfile model to extend the built-in User model with additional parent information
 class UserProfile(models.Model):
@@ -16,6 +20,35 @@ class UserProfile(models.Model):
     def __str__(self):
         return self.user.username
 
+AGE_GROUP_CHOICES = [
+    ('all', 'All'),
+    ('0-1', '0-1'),
+    ('1-3', '1-3'),
+    ('3-7', '3-7'),
+    ('7-10', '7-10'),
+    ]
+
+GENDER_CHOICES = [
+    ('male', 'Male'),
+    ('female', 'Female'),
+    ('any', 'Any'),
+    ]
+
+# Oldest age, in whole years of 365 days, of each bucket a child goes through.
+# Older children are in 'all'.
+AGE_BUCKET_LIMITS = [(1, '0-1'), (3, '1-3'), (7, '3-7'), (10, '7-10')]
+
+def age_bucket_for(date_of_birth, today=None):
+    """
+    Return the AGE_GROUP_CHOICES bucket of a child born on ``date_of_birth`` and
+    the date the child moves to the next one, None in the last bucket.
+    """
+    age = ((today or date.today()) - date_of_birth).days // 365
+    for limit, age_group in AGE_BUCKET_LIMITS:
+        if age <= limit:
+            return age_group, date_of_birth + timedelta(days=365 * (limit + 1))
+    return 'all', None
+
 # Child model to store information about the children
 
 class Child(models.Model):
@@ -29,28 +62,53 @@ class Child(models.Model):
     name = models.CharField(max_length=100)
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES)
     date_of_birth = models.DateField()
+    # Stored so feed segments are read, not computed, per request. save() sets
+    # them and the rebucket_children command moves children whose
+    # next_age_group_on has come to their next bucket.
+    age_group = models.CharField(max_length=5, choices=AGE_GROUP_CHOICES, default='all', editable=False)
+    next_age_group_on = models.DateField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_age_group_on'], name='child_next_age_group_idx'),
+            # Recipients of a published item in push feed mode, read from the index.
+            models.Index(fields=['age_group', 'user'], name='child_age_group_user_idx'),
+            models.Index(fields=['gender', 'user'], name='child_gender_user_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.user.username})"
 
+    def update_age_group(self, today=None):
+        # date_of_birth may still be the string it was assigned.
+        date_of_birth = self._meta.get_field('date_of_birth').to_python(self.date_of_birth)
+        self.age_group, self.next_age_group_on = age_bucket_for(date_of_birth, today)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'date_of_birth' in update_fields:
+            self.update_age_group()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'age_group', 'next_age_group_on'}
+        super().save(*args, **kwargs)
+
 # Blog model to store blog content
-AGE_GROUP_CHOICES = [
-    ('all', 'All'),
-    ('0-1', '0-1'),
-    ('1-3', '1-3'),
-    ('3-7', '3-7'),
-    ('7-10', '7-10'),
-    ]
+EXCERPT_LENGTH = 280
+
+def summarize(content):
+    """
+    Return the (excerpt, word_count) stored alongside a blog's content.
+    """
+    words = content.split()
+    return Truncator(' '.join(words)).chars(EXCERPT_LENGTH), len(words)
 
-GENDER_CHOICES = [
-    ('male', 'Male'),
-    ('female', 'Female'),
-    ('any', 'Any'),
-    ]
 class Blog(models.Model):
     title = models.CharField(max_length=200)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_posts')
     content = models.TextField()
+    # Computed from content on save so feeds never have to load the full text.
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
     published_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     status = models.BooleanField(default=False)
@@ -58,11 +116,29 @@ class Blog(models.Model):
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES, default='any')
 
     class Meta:
-        ordering = ('-published_at',)
+        ordering = ('-published_at', '-id')
+        # Partial indexes over published rows serving the home feed filters
+        # (age_group OR gender) and the unfiltered feed, already in feed order.
+        indexes = [
+            models.Index(fields=['-published_at', '-id'], condition=Q(status=True), name='blog_published_idx'),
+            models.Index(fields=['age_group', '-published_at', '-id'], condition=Q(status=True), name='blog_age_published_idx'),
+            models.Index(fields=['gender', '-published_at', '-id'], condition=Q(status=True), name='blog_gender_published_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def update_summary(self):
+        self.excerpt, self.word_count = summarize(self.content)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.update_summary()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt', 'word_count'}
+        super().save(*args, **kwargs)
+
 # Vlog model to store vlog content
 class Vlog(models.Model):
     title = models.CharField(max_length=200)
@@ -74,7 +150,41 @@ class Vlog(models.Model):
     age_group = models.CharField(max_length=5, choices=AGE_GROUP_CHOICES, default='all')
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES,default='any')
     class Meta:
-        ordering = ('-published_at',)
+        ordering = ('-published_at', '-id')
+        # Same feed access pattern as Blog.
+        indexes = [
+            models.Index(fields=['-published_at', '-id'], condition=Q(status=True), name='vlog_published_idx'),
+            models.Index(fields=['age_group', '-published_at', '-id'], condition=Q(status=True), name='vlog_age_published_idx'),
+            models.Index(fields=['gender', '-published_at', '-id'], condition=Q(status=True), name='vlog_gender_published_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+# Reference to a published blog or vlog in a parent's feed inbox. With
+# FEED_MODE = 'push' entries are written when an item is published (fan-out on
+# write), so reading a feed page is one range scan of the user's entries.
+class FeedEntry(models.Model):
+    KIND_CHOICES = [
+        ('blog', 'Blog'),
+        ('vlog', 'Vlog'),
+    ]
+
+    # The feed index below starts with the user, so no separate one is needed.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_entries', db_index=False)
+    kind = models.CharField(max_length=4, choices=KIND_CHOICES)
+    item_id = models.BigIntegerField()
+    # Copied from the item so pages are ordered and sliced from the index alone.
+    published_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-published_at', '-kind', '-item_id'], name='feedentry_user_feed_idx'),
+        ]
+        constraints = [
+            # Also the index withdrawing an item from every inbox.
+            models.UniqueConstraint(fields=['kind', 'item_id', 'user'], name='feedentry_item_user_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.item_id} ({self.user_id})"
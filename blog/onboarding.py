@@ -0,0 +1,88 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .inbox import children_changed
+from .models import Child, UserProfile
+from .serializers import ParentOnboardingSerializer
+
+
+def password_hashing_pool(workers=None):
+    """
+    Process pool for hash_passwords(). Password hashing is CPU-bound by design,
+    so it only scales across processes.
+    """
+    # Workers started with spawn rather than fork need their own Django setup
+    # for make_password() to read the hasher settings.
+    return ProcessPoolExecutor(max_workers=workers or settings.ONBOARDING_WORKERS, initializer=django.setup)
+
+
+def hash_passwords(passwords, pool=None):
+    if pool is None or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    return list(pool.map(make_password, passwords))
+
+
+def validate_parents(records):
+    """
+    Validate onboarding records like /api/register/ requests with a
+    ``children`` list. Returns the validated data and the errors of invalid
+    records as [{'index': ..., 'errors': ...}].
+    """
+    serializer = ParentOnboardingSerializer()
+    validated, errors = [], []
+    for index, record in enumerate(records):
+        try:
+            validated.append((index, serializer.run_validation(record)))
+        except ValidationError as exc:
+            errors.append({'index': index, 'errors': exc.detail})
+
+    # Usernames must be unique across the batch and against existing users.
+    counts = Counter(data['username'] for _, data in validated)
+    taken = set(User.objects.filter(username__in=counts).values_list('username', flat=True))
+    duplicates = taken | {username for username, count in counts.items() if count > 1}
+    if duplicates:
+        errors.extend(
+            {'index': index, 'errors': {'username': ['A user with that username already exists.']}}
+            for index, data in validated if data['username'] in duplicates
+        )
+        errors.sort(key=lambda error: error['index'])
+        validated = [(index, data) for index, data in validated if data['username'] not in duplicates]
+    return [data for _, data in validated], errors
+
+
+def create_parents(validated, pool=None):
+    """
+    Create users, profiles and children for validated onboarding records with
+    one bulk_create per model, in one transaction. Passwords are hashed on
+    ``pool`` when given. Returns the created users.
+    """
+    passwords = hash_passwords([data['password'] for data in validated], pool)
+    users = [
+        User(username=data['username'], email=data.get('email', ''), password=password)
+        for data, password in zip(validated, passwords)
+    ]
+    children = [
+        Child(user=user, **child)
+        for user, data in zip(users, validated) for child in data.get('children', [])
+    ]
+    for child in children:
+        child.update_age_group()
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=settings.BULK_BATCH_SIZE)
+        UserProfile.objects.bulk_create(
+            [
+                UserProfile(user=user, parent_type=data.get('parent_type') or 'first-time')
+                for user, data in zip(users, validated)
+            ],
+            batch_size=settings.BULK_BATCH_SIZE,
+        )
+        Child.objects.bulk_create(children, batch_size=settings.BULK_BATCH_SIZE)
+        children_changed(*{child.user_id for child in children})
+    return users
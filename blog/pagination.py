@@ -0,0 +1,225 @@
+import heapq
+import json
+from base64 import b64decode, b64encode
+from itertools import islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ContentCursorPagination(CursorPagination):
+    """
+    Opaque cursor pagination over Blog/Vlog querysets ordered like Meta.ordering,
+    so fetching a later page costs the same as fetching the first one.
+    """
+    ordering = ('-published_at', '-id')
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+
+def item_key(item, kind):
+    # Items of one kind are sorted by (published_at, id) descending; the kind
+    # breaks ties between blogs and vlogs that share a timestamp and an id.
+    return parse_datetime(item['published_at']), kind, item['id']
+
+
+def _index_after(items, kind, position):
+    # Binary search for the first item strictly older than the cursor position.
+    lo, hi = 0, len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if item_key(items[mid], kind) < position:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def _entries_after(entries, position, kind=True):
+    # FeedEntry rows strictly older than a cursor position. Within one kind the
+    # position's kind part is only the list name and takes no part.
+    published_at, entry_kind, pk = position
+    if not kind:
+        return entries.filter(Q(published_at__lt=published_at) | Q(published_at=published_at, item_id__lt=pk))
+    return entries.filter(
+        Q(published_at__lt=published_at)
+        | Q(published_at=published_at, kind__lt=entry_kind)
+        | Q(published_at=published_at, kind=entry_kind, item_id__lt=pk)
+    )
+
+
+def _entry_refs(entries, limit):
+    return list(
+        entries.order_by('-published_at', '-kind', '-item_id')
+        .values_list('published_at', 'kind', 'item_id')[:limit]
+    )
+
+
+def _keyed(items, kind):
+    for item in items:
+        yield item_key(item, kind), kind, item
+
+
+class FeedCursorPagination(ContentCursorPagination):
+    """
+    Keyset pagination for the home feed, whose blogs and vlogs are lists sorted
+    by (-published_at, -id). They are either paginated side by side, with the
+    cursor storing the position reached in every list, or merged into a single
+    timeline with one position.
+    """
+
+    def decode_feed_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return {}
+        try:
+            positions = json.loads(b64decode(encoded.encode('ascii')).decode('ascii'))
+            cursor = {}
+            for name, (published_at, kind, pk) in positions.items():
+                published_at = parse_datetime(published_at)
+                if published_at is None:
+                    raise ValueError
+                cursor[name] = (published_at, str(kind), int(pk))
+            return cursor
+        except (TypeError, ValueError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_feed_cursor(self, positions):
+        data = json.dumps({
+            name: [published_at.isoformat(), kind, pk]
+            for name, (published_at, kind, pk) in positions.items()
+        })
+        encoded = b64encode(data.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def paginate_feed(self, feed, request):
+        """
+        Return one page of each list in ``feed`` ({name: sorted items}).
+        """
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_feed_cursor(request)
+
+        page = {}
+        positions = {}
+        has_next = False
+        for name, items in feed.items():
+            start = _index_after(items, name, cursor[name]) if name in cursor else 0
+            page[name] = items[start:start + page_size]
+            has_next = has_next or start + page_size < len(items)
+            if page[name]:
+                positions[name] = item_key(page[name][-1], name)
+            elif name in cursor:
+                positions[name] = cursor[name]
+
+        self.next_link = self.encode_feed_cursor(positions) if has_next else None
+        return page
+
+    def paginate_merged(self, streams, request):
+        """
+        Return one page of the timeline merging every list in ``streams``
+        ({kind: sorted items}), each item tagged with its kind.
+        """
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        position = self.decode_feed_cursor(request).get('merged')
+
+        # Only the tail of each list past the cursor takes part in the merge and
+        # it stops after one page, so a page costs the same wherever it starts.
+        tails = []
+        for kind, items in streams.items():
+            start = _index_after(items, kind, position) if position else 0
+            tails.append(_keyed(islice(items, start, None), kind))
+        merged = list(islice(heapq.merge(*tails, key=itemgetter(0), reverse=True), page_size + 1))
+
+        page = [{'type': kind, **item} for _, kind, item in merged[:page_size]]
+        self.next_link = None
+        if len(merged) > page_size:
+            self.next_link = self.encode_feed_cursor({'merged': merged[page_size - 1][0]})
+        return {'results': page}
+
+    def paginate_inbox(self, inbox, request):
+        """
+        paginate_feed() over FeedEntry querysets ({name: one kind of entries}),
+        returning (published_at, kind, item_id) references. Cursors are the
+        same as paginate_feed()'s, so they stay valid across feed modes.
+        """
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_feed_cursor(request)
+
+        page = {}
+        positions = {}
+        has_next = False
+        for name, entries in inbox.items():
+            if name in cursor:
+                entries = _entries_after(entries, cursor[name], kind=False)
+            refs = _entry_refs(entries, page_size + 1)
+            page[name] = refs[:page_size]
+            has_next = has_next or len(refs) > page_size
+            if page[name]:
+                published_at, _, pk = page[name][-1]
+                positions[name] = (published_at, name, pk)
+            elif name in cursor:
+                positions[name] = cursor[name]
+
+        self.next_link = self.encode_feed_cursor(positions) if has_next else None
+        return page
+
+    def paginate_inbox_merged(self, entries, request):
+        """
+        paginate_merged() over a FeedEntry queryset, returning references.
+        """
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        position = self.decode_feed_cursor(request).get('merged')
+        if position:
+            entries = _entries_after(entries, position)
+        refs = _entry_refs(entries, page_size + 1)
+
+        self.next_link = None
+        if len(refs) > page_size:
+            self.next_link = self.encode_feed_cursor({'merged': refs[page_size - 1]})
+        return refs[:page_size]
+
+    def get_paginated_response(self, page):
+        return Response({'next': self.next_link, **page})
+
+
+class SearchPagination(ContentCursorPagination):
+    """
+    Page-number pagination for ranked search results, which have no stable
+    ordering key to build a cursor from. Pages are fetched one row past their
+    end to tell whether there is a next one, so no count query is needed.
+    """
+    page_query_param = 'page'
+    invalid_page_message = 'Invalid page.'
+
+    def paginate_search(self, search, request):
+        """
+        Return one page of ``search(limit, offset)``.
+        """
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        try:
+            number = int(request.query_params.get(self.page_query_param, 1))
+            if number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+
+        hits = search(page_size + 1, (number - 1) * page_size)
+        self.next_link = None
+        if len(hits) > page_size:
+            self.next_link = replace_query_param(self.base_url, self.page_query_param, number + 1)
+        return hits[:page_size]
+
+    def get_paginated_response(self, page):
+        return Response({'next': self.next_link, 'results': page})
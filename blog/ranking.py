@@ -0,0 +1,114 @@
+import heapq
+import math
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# In requirements.txt. Without it candidates are scored and selected in pure
+# Python, with the same results.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# (type, home feed list) of the items ranked together.
+FEED_KINDS = [('blog', 'blogs'), ('vlog', 'vlogs')]
+
+
+def ranking_weights(parent_type):
+    weights = settings.FEED_RANKING['PARENT_TYPES']
+    return weights.get(parent_type) or weights[settings.FEED_RANKING['DEFAULT_PARENT_TYPE']]
+
+
+def _timestamps(items):
+    return [parse_datetime(item['published_at']).timestamp() for item in items]
+
+
+def _decay_rate(weights):
+    # Scores halve every half_life_hours. The decay multiplies every score by
+    # the same factor as time passes, so the ranking of a feed doesn't change
+    # until the feed itself does.
+    return math.log(2) / (weights['half_life_hours'] * 3600)
+
+
+def _python_scores(items, children, weights, now):
+    rate = _decay_rate(weights)
+    scores = []
+    for item, published in zip(items, _timestamps(items)):
+        relevance = 1.0
+        for age_group, gender in children:
+            if item['age_group'] == age_group:
+                relevance += weights['age']
+            if item['gender'] == gender:
+                relevance += weights['gender']
+            elif item['gender'] == 'any':
+                relevance += weights['any_gender']
+        scores.append(relevance * math.exp(-rate * max(now - published, 0)))
+    return scores
+
+
+def _numpy_scores(items, children, weights, now):
+    rate = _decay_rate(weights)
+    relevance = numpy.ones(len(items))
+    if children:
+        # (candidates, children) match matrices, summed over the children.
+        item_ages = numpy.array([item['age_group'] for item in items])[:, None]
+        item_genders = numpy.array([item['gender'] for item in items])[:, None]
+        child_ages = numpy.array([age_group for age_group, _ in children])[None, :]
+        child_genders = numpy.array([gender for _, gender in children])[None, :]
+        gender_match = numpy.where(
+            item_genders == child_genders, weights['gender'],
+            numpy.where(item_genders == 'any', weights['any_gender'], 0.0),
+        )
+        relevance += ((item_ages == child_ages) * weights['age'] + gender_match).sum(axis=1)
+    ages = numpy.maximum(now - numpy.array(_timestamps(items)), 0)
+    return relevance * numpy.exp(-rate * ages)
+
+
+def score_items(items, children, parent_type, now=None):
+    """
+    Relevance of serialized feed items to a parent of ``parent_type`` whose
+    children are in the given (age_group, gender) segments. Every child whose
+    age group, or gender, the item is for adds to its score, which then decays
+    with the item's age as set for the parent type in FEED_RANKING.
+    """
+    now = (now or timezone.now()).timestamp()
+    weights = ranking_weights(parent_type)
+    if numpy is not None:
+        return _numpy_scores(items, children, weights, now)
+    return _python_scores(items, children, weights, now)
+
+
+def top_k(items, scores, k):
+    """
+    The ``k`` items with the highest scores, best first. Of items with the same
+    score the one earlier in ``items`` comes first.
+    """
+    if k <= 0 or not items:
+        return []
+    if numpy is not None:
+        scores = numpy.asarray(scores)
+        if k < len(items):
+            # Partial sort: the k-th best score is found in linear time and
+            # only the candidates scoring at least as much are sorted.
+            threshold = -numpy.partition(-scores, k - 1)[k - 1]
+            above = numpy.flatnonzero(scores > threshold)
+            tied = numpy.flatnonzero(scores == threshold)[:k - len(above)]
+            selected = numpy.concatenate((above, tied))
+        else:
+            selected = numpy.arange(len(items))
+        order = selected[numpy.lexsort((selected, -scores[selected]))]
+        return [items[index] for index in order.tolist()]
+    order = heapq.nsmallest(k, range(len(items)), key=lambda index: (-scores[index], index))
+    return [items[index] for index in order]
+
+
+def rank_feed(feed, children, parent_type, k, now=None):
+    """
+    Return the ``k`` most relevant items of a home feed ({'blogs', 'vlogs'}),
+    each tagged with its type, best first.
+    """
+    candidates = [(kind, item) for kind, name in FEED_KINDS for item in feed[name]]
+    scores = score_items([item for _, item in candidates], children, parent_type, now)
+    return [{'type': kind, **item} for kind, item in top_k(candidates, scores, k)]
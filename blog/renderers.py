@@ -0,0 +1,93 @@
+import math
+from decimal import Decimal
+
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Both are optional: without orjson JSON is rendered by DRF's encoder, and
+# without msgpack MessagePack is not offered.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def _default(obj):
+    # Everything orjson doesn't serialize natively, datetimes included so they
+    # are formatted like DRF does, goes through DRF's encoder.
+    return JSONEncoder().default(obj)
+
+
+def _non_finite(data):
+    # NaN and infinities, which orjson writes as null where DRF's encoder
+    # rejects them under STRICT_JSON, or writes NaN/Infinity without it.
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, Decimal):
+        return not data.is_finite()
+    if isinstance(data, dict):
+        return any(_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_non_finite(value) for value in data)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer rendering with orjson, producing the same JSON values as
+    DRF's encoder; only float exponents are written differently (1e16 rather
+    than 1e+16). Data with NaN or infinite numbers is left to DRF, so
+    STRICT_JSON applies, as is indented output, requested with an ``indent``
+    media type parameter.
+    """
+    available = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data, default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # Only data containing null can hold a non-finite number orjson converted.
+        if b'null' in ret and _non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped by DRF too, as JavaScript string literals can't contain them.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack, for clients sending ``Accept: application/msgpack``. Values
+    without a MessagePack type are encoded as they would be in JSON.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    available = msgpack is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True, strict_types=False)
+
+
+class AvailableRendererNegotiation(DefaultContentNegotiation):
+    """
+    Content negotiation skipping renderers whose library isn't installed.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderers = [renderer for renderer in renderers if getattr(renderer, 'available', True)]
+        return super().select_renderer(request, renderers, format_suffix)
@@ -0,0 +1,148 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+# Routing state of the request being handled, set by ReplicaMiddleware. It is
+# copied into the threads async views run queries on.
+_routing = ContextVar('replica_routing', default=None)
+
+PIN_CACHE_PREFIX = 'replica-pin'
+
+
+class RoutingState:
+    def __init__(self):
+        # Alias reads go to; None reads from the primary.
+        self.replica = None
+        self.wrote = False
+
+
+def pin_key(user_id):
+    return f'{PIN_CACHE_PREFIX}:{user_id}'
+
+
+def is_pinned(user):
+    return cache.get(pin_key(user.pk)) is not None
+
+
+def pin_to_primary(user):
+    """
+    Send ``user``'s reads to the primary for REPLICA_PIN_SECONDS, so they see
+    their own writes whatever the replication lag.
+    """
+    cache.set(pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def _choose(user, pinned):
+    state = _routing.get()
+    if state is None or not settings.DATABASE_REPLICAS or not user.is_authenticated or pinned:
+        return
+    # One replica per request, so its reads see one consistent snapshot.
+    state.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+def read_from_replica(user):
+    """
+    Route the rest of the current request's reads to a replica, unless
+    ``user`` recently wrote.
+    """
+    _choose(user, user.is_authenticated and is_pinned(user))
+
+
+async def aread_from_replica(user):
+    _choose(user, user.is_authenticated and await cache.aget(pin_key(user.pk)) is not None)
+
+
+class ReplicaRouter:
+    """
+    Reads go to the replica chosen for a read-only request and everything else
+    to the primary: writes, reads of requests that wrote, reads inside a
+    transaction and reads outside requests (commands, background fan-out).
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or state.replica is None or state.wrote:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Track database routing per request. Views opt in to replica reads with
+    ReplicaReadMixin; a request that writes pins its user to the primary.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        self.finish(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        if state.wrote:
+            await sync_to_async(self.finish)(request, state)
+        return response
+
+    def finish(self, request, state):
+        # DRF authenticates in the view and sets the user on the request then.
+        user = getattr(request, 'user', None)
+        if state.wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user)
+
+
+class ReplicaReadMixin:
+    """
+    Read from a replica on safe requests to API views and on the
+    ``replica_actions`` of viewsets, once the user is authenticated.
+    """
+    replica_actions = {'list', 'retrieve'}
+
+    def reads_from_replica(self, request):
+        if request.method not in SAFE_METHODS:
+            return False
+        action = getattr(self, 'action', None)
+        return action is None or action in self.replica_actions
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.reads_from_replica(request):
+            read_from_replica(request.user)
@@ -0,0 +1,201 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import Blog, Vlog
+
+# Published blogs and vlogs are indexed in one table, created by migration
+# 0004: an FTS5 virtual table on SQLite, a table with a GIN-indexed tsvector
+# column on PostgreSQL. Other database vendors have no search index.
+SEARCH_TABLE = 'blog_search'
+
+# kind -> (model, field indexed besides the title)
+SEARCH_MODELS = {
+    'blog': (Blog, 'content'),
+    'vlog': (Vlog, None),
+}
+KINDS = list(SEARCH_MODELS)
+
+# Saves that touch none of these leave an item's index entry unchanged.
+INDEXED_FIELDS = {'title', 'content', 'status', 'age_group', 'gender'}
+
+# Title matches rank above body matches.
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+
+def document_id(kind, pk):
+    # Blogs and vlogs share the table: the kind is folded into the row id so an
+    # item is replaced or removed by primary key.
+    return pk * len(KINDS) + KINDS.index(kind)
+
+
+def split_document_id(doc_id):
+    pk, kind = divmod(doc_id, len(KINDS))
+    return KINDS[kind], pk
+
+
+def kind_of(instance):
+    for kind, (model, _) in SEARCH_MODELS.items():
+        if isinstance(instance, model):
+            return kind
+    raise TypeError(f'{type(instance).__name__} is not searchable.')
+
+
+def search_document(instance):
+    """
+    (document id, kind, age_group, gender, title, body) indexed for ``instance``.
+    """
+    kind = kind_of(instance)
+    body_field = SEARCH_MODELS[kind][1]
+    body = getattr(instance, body_field) if body_field else ''
+    return document_id(kind, instance.pk), kind, instance.age_group, instance.gender, instance.title, body
+
+
+class SQLiteSearchBackend:
+    def match_expression(self, query):
+        # User input is reduced to quoted terms, all of which must match, so
+        # FTS5 query syntax in it can't raise errors.
+        terms = re.findall(r'\w+', query)
+        return ' '.join('"%s"' % term for term in terms)
+
+    def upsert(self, cursor, documents):
+        self.delete(cursor, [document[0] for document in documents])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, kind, age_group, gender, title, body) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            documents,
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(doc_id,) for doc_id in doc_ids])
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def search(self, cursor, query, filters, params, limit, offset):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        # bm25() takes one weight per column, unindexed ones included, and
+        # scores better matches lower.
+        cursor.execute(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s{filters} '
+            f'ORDER BY bm25({SEARCH_TABLE}, 0, 0, 0, {TITLE_WEIGHT}, {BODY_WEIGHT}), rowid DESC '
+            'LIMIT %s OFFSET %s',
+            [match, *params, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgreSQLSearchBackend:
+    config = 'english'
+
+    def upsert(self, cursor, documents):
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (id, kind, age_group, gender, document) '
+            f"VALUES (%s, %s, %s, %s, setweight(to_tsvector('{self.config}', %s), 'A') "
+            f"|| setweight(to_tsvector('{self.config}', %s), 'B')) "
+            'ON CONFLICT (id) DO UPDATE SET kind = EXCLUDED.kind, age_group = EXCLUDED.age_group, '
+            'gender = EXCLUDED.gender, document = EXCLUDED.document',
+            documents,
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE id = ANY(%s)', [list(doc_ids)])
+
+    def clear(self, cursor):
+        cursor.execute(f'TRUNCATE {SEARCH_TABLE}')
+
+    def search(self, cursor, query, filters, params, limit, offset):
+        cursor.execute(
+            f"SELECT id FROM {SEARCH_TABLE}, websearch_to_tsquery('{self.config}', %s) query "
+            f'WHERE document @@ query{filters} '
+            f"ORDER BY ts_rank(document, query, 1) DESC, id DESC LIMIT %s OFFSET %s",
+            [query, *params, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend(),
+    'postgresql': PostgreSQLSearchBackend(),
+}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    return SEARCH_BACKENDS.get(connections[using].vendor)
+
+
+def index_items(*instances, using=DEFAULT_DB_ALIAS):
+    """
+    Bring the index entries of ``instances`` up to date: published items are
+    (re)indexed, unpublished ones removed.
+    """
+    backend = get_backend(using)
+    if backend is None or not instances:
+        return
+    documents = [search_document(instance) for instance in instances if instance.status]
+    unpublished = [document_id(kind_of(instance), instance.pk) for instance in instances if not instance.status]
+    with connections[using].cursor() as cursor:
+        if documents:
+            backend.upsert(cursor, documents)
+        if unpublished:
+            backend.delete(cursor, unpublished)
+
+
+def remove_items(*instances, using=DEFAULT_DB_ALIAS):
+    backend = get_backend(using)
+    if backend is None or not instances:
+        return
+    with connections[using].cursor() as cursor:
+        backend.delete(cursor, [document_id(kind_of(instance), instance.pk) for instance in instances])
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS, batch_size=1000):
+    """
+    Reindex every published item from scratch. Returns the number of items indexed.
+    """
+    backend = get_backend(using)
+    if backend is None:
+        return 0
+    indexed = 0
+    with connections[using].cursor() as cursor:
+        backend.clear(cursor)
+        for kind, (model, body_field) in SEARCH_MODELS.items():
+            fields = ['id', 'title', 'age_group', 'gender', 'status'] + ([body_field] if body_field else [])
+            queryset = model.objects.using(using).filter(status=True).only(*fields)
+            batch = []
+            for instance in queryset.iterator(chunk_size=batch_size):
+                batch.append(search_document(instance))
+                if len(batch) == batch_size:
+                    backend.upsert(cursor, batch)
+                    indexed += len(batch)
+                    batch = []
+            backend.upsert(cursor, batch)
+            indexed += len(batch)
+    return indexed
+
+
+def search(query, age_group=None, gender=None, kind=None, limit=20, offset=0, using=DEFAULT_DB_ALIAS):
+    """
+    Rank published items matching ``query`` and return one page of them as
+    (kind, pk) pairs, best match first. ``age_group`` and ``gender`` keep items
+    targeted at them or at everyone ('all'/'any').
+    """
+    backend = get_backend(using)
+    if backend is None:
+        return []
+    filters, params = '', []
+    if age_group:
+        filters += " AND age_group IN (%s, 'all')"
+        params.append(age_group)
+    if gender:
+        filters += " AND gender IN (%s, 'any')"
+        params.append(gender)
+    if kind:
+        filters += ' AND kind = %s'
+        params.append(kind)
+    with connections[using].cursor() as cursor:
+        doc_ids = backend.search(cursor, query, filters, params, limit, offset)
+    return [split_document_id(doc_id) for doc_id in doc_ids]
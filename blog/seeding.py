@@ -0,0 +1,78 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+from .models import Blog, Vlog, Child, UserProfile, AGE_GROUP_CHOICES, GENDER_CHOICES, summarize
+
+AGE_GROUPS = [value for value, _ in AGE_GROUP_CHOICES]
+GENDERS = [value for value, _ in GENDER_CHOICES]
+CHILD_GENDERS = [value for value, _ in Child.GENDER_CHOICES]
+PARENT_TYPES = [value for value, _ in UserProfile.PARENT_TYPE_CHOICES]
+
+
+class Rollback(Exception):
+    """
+    Raised at the end of a transaction.atomic() block to discard seeded rows.
+    """
+
+
+def seed_author(username='seed-author', using='default'):
+    return User.objects.db_manager(using).create_user(username=username)
+
+
+def seed_parents(count, children_per_parent=2, password='seed-password', prefix='seed-parent', using='default'):
+    """
+    Bulk insert ``count`` parents, all with ``password``, each with a profile
+    and ``children_per_parent`` children of random ages up to 11 years.
+    """
+    # One hash shared by every parent: hashing is deliberately slow.
+    hashed = make_password(password)
+    users = User.objects.db_manager(using).bulk_create(
+        (User(username=f'{prefix}-{i}', password=hashed) for i in range(count)), batch_size=1000,
+    )
+    UserProfile.objects.using(using).bulk_create(
+        (UserProfile(user=user, parent_type=random.choice(PARENT_TYPES)) for user in users), batch_size=1000,
+    )
+    today = date.today()
+    children = []
+    for user in users:
+        for i in range(children_per_parent):
+            child = Child(
+                user=user,
+                name=f'Child {i}',
+                gender=random.choice(CHILD_GENDERS),
+                date_of_birth=today - timedelta(days=random.randrange(11 * 365)),
+            )
+            child.update_age_group(today)
+            children.append(child)
+    Child.objects.using(using).bulk_create(children, batch_size=1000)
+    return users
+
+
+def seed_content(rows, author, using='default', published_ratio=0.8, content_length=2000, vlog_rows=None):
+    """
+    Bulk insert ``rows`` blogs and ``vlog_rows`` (by default ``rows``) vlogs
+    with random segments, for benchmarks and query plan comparisons.
+    """
+    content = ' '.join(['lorem'] * (content_length // 6))
+    excerpt, word_count = summarize(content)
+    for model, count, extra in (
+        (Blog, rows, {'content': content, 'excerpt': excerpt, 'word_count': word_count}),
+        (Vlog, rows if vlog_rows is None else vlog_rows, {'video_url': 'https://example.com/v'}),
+    ):
+        model.objects.using(using).bulk_create(
+            (
+                model(
+                    title=f'{model.__name__} {i}',
+                    author=author,
+                    status=random.random() < published_ratio,
+                    age_group=random.choice(AGE_GROUPS),
+                    gender=random.choice(GENDERS),
+                    **extra,
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
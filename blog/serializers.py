@@ -1,14 +1,33 @@
 from rest_framework import serializers
 from .models import UserProfile, Child, Blog, Vlog
+from .metrics import timed_converter, timing
 from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601
+from rest_framework.settings import api_settings
 
 
-class UserSerializer(serializers.ModelSerializer):
+class ModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer whose representation time counts towards the request's
+    serialization metrics.
+    """
+
+    def to_representation(self, instance):
+        with timing('serialization'):
+            return super().to_representation(instance)
+
+
+class UserSerializer(ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email']
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(ModelSerializer):
     user = UserSerializer()
 
     class Meta:
@@ -16,24 +35,33 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['id','user', 'parent_type']
         extra_kwargs = {'user': {'read_only': True}}
 
-class ChildSerializer(serializers.ModelSerializer):
+class ChildSerializer(ModelSerializer):
     class Meta:
         model = Child
         fields = ['id','user', 'name', 'gender', 'date_of_birth']
         extra_kwargs = {'user': {'read_only': True}}
 
-class BlogSerializer(serializers.ModelSerializer):
+class BlogSerializer(ModelSerializer):
     class Meta:
         model = Blog
         fields = ['id', 'title', 'content', 'published_at', 'updated_at', 'status', 'age_group','gender']
 
-class VlogSerializer(serializers.ModelSerializer):
+class BlogSummarySerializer(ModelSerializer):
+    """
+    Blog without its content, for feeds and lists. The full text is served by
+    the detail endpoint.
+    """
+    class Meta:
+        model = Blog
+        fields = ['id', 'title', 'excerpt', 'word_count', 'published_at', 'updated_at', 'status', 'age_group','gender']
+
+class VlogSerializer(ModelSerializer):
     class Meta:
         model = Vlog
         fields = ['id', 'title', 'video_url', 'published_at', 'updated_at', 'status', 'age_group','gender']
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(ModelSerializer):
     parent_type = serializers.ChoiceField(choices=UserProfile.PARENT_TYPE_CHOICES,required=False, allow_null=True)
 
     class Meta:
@@ -50,3 +78,134 @@ class RegisterSerializer(serializers.ModelSerializer):
         user.save()
         UserProfile.objects.create(user=user)
         return user
+
+
+class ParentOnboardingSerializer(RegisterSerializer):
+    """
+    RegisterSerializer for bulk onboarding, with the parent's children. The
+    unique username check is left to the onboarding code, which runs it with
+    one query per batch instead of one per parent.
+    """
+    children = ChildSerializer(many=True, required=False)
+
+    class Meta(RegisterSerializer.Meta):
+        fields = RegisterSerializer.Meta.fields + ['children']
+        extra_kwargs = {
+            **RegisterSerializer.Meta.extra_kwargs,
+            'username': {'validators': [UnicodeUsernameValidator()]},
+        }
+
+
+class ValuesSerializer:
+    """
+    Read-only fast path for flat ModelSerializers. Rows are fetched as
+    values_list() tuples and converted with per-field functions resolved once,
+    skipping model instantiation and the per-row DRF field machinery. The
+    output is identical to ``serializer_class(queryset, many=True).data``.
+    """
+    # Fields whose to_representation() returns database values unchanged.
+    IDENTITY_FIELDS = (
+        serializers.CharField,
+        serializers.ChoiceField,
+        serializers.BooleanField,
+        serializers.IntegerField,
+    )
+
+    def __init__(self, serializer_class, fields=None):
+        self.serializer_class = serializer_class
+        # Names of the serializer fields to output; None outputs all of them.
+        self.fields = fields
+        self._restricted = {}
+
+    @cached_property
+    def _plan(self):
+        model = self.serializer_class.Meta.model
+        columns, fields = [], []
+        for name, field in self.serializer_class().fields.items():
+            if self.fields is not None and name not in self.fields:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is None or (
+                model_field.is_relation and not isinstance(field, serializers.PrimaryKeyRelatedField)
+            ):
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} can't be read from a values() row."
+                )
+            columns.append(model_field.attname)
+            fields.append((name, field))
+        return columns, fields
+
+    def _converter(self, field, field_timezone):
+        if isinstance(field, serializers.PrimaryKeyRelatedField) or (
+            isinstance(field, self.IDENTITY_FIELDS)
+            and not isinstance(field, serializers.MultipleChoiceField)
+        ):
+            return None
+        if (
+            isinstance(field, serializers.DateTimeField)
+            and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601
+            and not hasattr(field, 'timezone')
+            and field_timezone is not None
+        ):
+            # DateTimeField.to_representation() looks up the active timezone for
+            # every value; with it resolved up front only the formatting is left.
+            def to_iso_8601(value):
+                if timezone.is_naive(value):
+                    return field.to_representation(value)
+                value = value.astimezone(field_timezone).isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return to_iso_8601
+        return field.to_representation
+
+    def row_converter(self):
+        """
+        Return a function turning one values_list() row into its representation,
+        bound to the timezone active at the time of the call.
+        """
+        field_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        converters = [
+            (name, self._converter(field, field_timezone)) for name, field in self._plan[1]
+        ]
+
+        def to_representation(row):
+            return {
+                name: value if convert is None or value is None else convert(value)
+                for (name, convert), value in zip(converters, row)
+            }
+        return timed_converter('serialization', to_representation)
+
+    @property
+    def columns(self):
+        return self._plan[0]
+
+    @property
+    def field_names(self):
+        return [name for name, _ in self._plan[1]]
+
+    def restrict(self, fields):
+        """
+        Return a ValuesSerializer of the given fields only, among the ones this
+        serializer outputs, which reads only their columns.
+        """
+        fields = tuple(name for name in self.field_names if name in fields)
+        if fields not in self._restricted:
+            self._restricted[fields] = ValuesSerializer(self.serializer_class, fields)
+        return self._restricted[fields]
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def to_representation(self, row):
+        return self.row_converter()(row)
+
+    def serialize(self, queryset):
+        to_representation = self.row_converter()
+        return [to_representation(row) for row in self.rows(queryset)]
+
+
+blog_values_serializer = ValuesSerializer(BlogSerializer)
+blog_summary_values_serializer = ValuesSerializer(BlogSummarySerializer)
+vlog_values_serializer = ValuesSerializer(VlogSerializer)
@@ -0,0 +1,106 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from django.contrib.auth.models import User
+
+from .authentication import invalidate_user_context
+from .cache import invalidate_segments
+from .detail_cache import invalidate_details
+from .inbox import items_changed, children_changed
+from .models import Blog, Vlog, Child, UserProfile
+from .search import INDEXED_FIELDS, index_items, remove_items
+
+
+@receiver(pre_save, sender=Blog)
+@receiver(pre_save, sender=Vlog)
+def remember_feed_segment(sender, instance, **kwargs):
+    # An update can move an item out of a segment, so the segment it had before
+    # the save has to be invalidated as well as the new one.
+    instance._previous_segment = instance._previous_status = None
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list('age_group', 'gender', 'status').first()
+        if previous:
+            instance._previous_segment, instance._previous_status = previous[:2], previous[2]
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Vlog)
+def invalidate_feed_on_save(sender, instance, **kwargs):
+    segments = [(instance.age_group, instance.gender)]
+    previous = getattr(instance, '_previous_segment', None)
+    if previous and previous != segments[0]:
+        segments.append(previous)
+    invalidate_segments(*segments)
+
+
+@receiver(post_delete, sender=Blog)
+@receiver(post_delete, sender=Vlog)
+def invalidate_feed_on_delete(sender, instance, **kwargs):
+    invalidate_segments((instance.age_group, instance.gender))
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Vlog)
+@receiver(post_delete, sender=Blog)
+@receiver(post_delete, sender=Vlog)
+def invalidate_detail(sender, instance, using, **kwargs):
+    invalidate_details(instance, using=using)
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Vlog)
+def index_on_save(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    index_items(instance, using=using)
+
+
+@receiver(post_delete, sender=Blog)
+@receiver(post_delete, sender=Vlog)
+def unindex_on_delete(sender, instance, using, **kwargs):
+    remove_items(instance, using=using)
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Vlog)
+def fan_out_on_save(sender, instance, using, **kwargs):
+    # Inboxes only change when an item is published or unpublished, or a
+    # published item moves to another segment.
+    previous_status = getattr(instance, '_previous_status', None)
+    if not (instance.status or previous_status):
+        return
+    segment = (instance.age_group, instance.gender)
+    if instance.status != previous_status or segment != getattr(instance, '_previous_segment', None):
+        items_changed(instance, using=using)
+
+
+@receiver(post_delete, sender=Blog)
+@receiver(post_delete, sender=Vlog)
+def fan_out_on_delete(sender, instance, using, **kwargs):
+    if instance.status:
+        items_changed(instance, using=using)
+
+
+@receiver(post_save, sender=Child)
+def rebuild_inbox_on_child_save(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is None or {'age_group', 'gender', 'user'} & set(update_fields):
+        children_changed(instance.user_id, using=using)
+
+
+@receiver(post_delete, sender=Child)
+def rebuild_inbox_on_child_delete(sender, instance, using, **kwargs):
+    children_changed(instance.user_id, using=using)
+
+
+@receiver(post_save, sender=Child)
+@receiver(post_delete, sender=Child)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_context_on_owned_change(sender, instance, **kwargs):
+    invalidate_user_context(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_context_on_user_change(sender, instance, **kwargs):
+    invalidate_user_context(instance.pk)
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_QUERY_PARAM = 'stream'
+
+
+def wants_stream(request):
+    return request.query_params.get(STREAM_QUERY_PARAM, '').lower() in ('1', 'true', 'yes')
+
+
+def _encoder():
+    # Same output as DRF's JSONRenderer with the default settings.
+    return JSONEncoder(
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+    )
+
+
+def iter_json_array(queryset, to_representation, chunk_size=None):
+    """
+    Yield ``queryset`` as a JSON array, serializing rows with
+    ``to_representation`` as they are fetched from a database cursor. Output
+    is flushed once per chunk of rows, so memory stays bounded by
+    ``chunk_size`` whatever the size of the queryset.
+    """
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    encode = _encoder().encode
+    separator = ''
+    parts = ['[']
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        parts.append(separator + encode(to_representation(obj)))
+        separator = ','
+        if len(parts) >= chunk_size:
+            yield ''.join(parts).encode()
+            parts = []
+    parts.append(']')
+    yield ''.join(parts).encode()
+
+
+def iter_json_object(members):
+    """
+    Yield a JSON object whose values are streamed arrays, from ``members``:
+    an iterable of (key, iterator of array chunks).
+    """
+    encode = _encoder().encode
+    separator = '{'
+    for key, chunks in members:
+        yield f'{separator}{encode(key)}:'.encode()
+        yield from chunks
+        separator = ','
+    yield b'}' if separator == ',' else b'{}'
+
+
+def streaming_json_response(chunks):
+    return StreamingHttpResponse(chunks, content_type='application/json')
+
+
+class StreamingListMixin:
+    """
+    Let ``?stream=1`` return the whole list as a streamed JSON array instead of
+    a page rendered in memory.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not wants_stream(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        return streaming_json_response(iter_json_array(queryset, serializer.to_representation))
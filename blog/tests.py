@@ -1,10 +1,39 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
 from .models import *
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from .blacklist import revoked_tokens
+from .cache import segment_key
+from .detail_cache import LRUCache, get_details, lock_key, payload_key, version_key
+from .metrics import registry, snapshots
+from .compression import brotli
+from . import ranking
+from .renderers import ORJSONRenderer, msgpack
+from .serializers import BlogSerializer, VlogSerializer, ChildSerializer, ValuesSerializer
 from urllib.parse import urlencode
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from django.db import connections
+from django.core.management.base import CommandError
+from io import StringIO
+import os
+import tempfile
+import threading
+import gzip
+from unittest import mock, skipUnless
 
 class UserProfileTestCase(TestCase):
     def setUp(self):
@@ -200,4 +229,1174 @@ class BlogVlogTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         blog.refresh_from_db()
         self.assertEqual(blog.title, 'Updated Blog')
-        self.assertEqual(blog.content, 'This is a updated blog content.')
\ No newline at end of file
+        self.assertEqual(blog.content, 'This is a updated blog content.')
+
+
+class HomeFeedTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+        Child.objects.create(user=self.user, name='Test Child', gender='female',
+                             date_of_birth=date.today() - timedelta(days=365 * 2))
+
+    def test_feed_matches_child_segment(self):
+        """
+        Test the feed only contains published items matching a child's age group or gender.
+        """
+        Blog.objects.create(title='Toddlers', content='...', author=self.user, status=True, age_group='1-3')
+        Blog.objects.create(title='Girls', content='...', author=self.user, status=True, gender='female')
+        Blog.objects.create(title='Babies', content='...', author=self.user, status=True, age_group='0-1', gender='male')
+        Blog.objects.create(title='Draft', content='...', author=self.user, age_group='1-3')
+        response = self.client.get(reverse('home_feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({blog['title'] for blog in response.data['blogs']}, {'Toddlers', 'Girls'})
+
+    def test_feed_cache_invalidated_on_save(self):
+        """
+        Test a cached segment feed is refreshed when a matching blog is published or changed.
+        """
+        blog = Blog.objects.create(title='Toddlers', content='...', author=self.user, age_group='1-3')
+        self.assertEqual(self.client.get(reverse('home_feed')).data['blogs'], [])
+
+        blog.status = True
+        blog.save()
+        self.assertEqual(len(self.client.get(reverse('home_feed')).data['blogs']), 1)
+
+        blog.age_group = '7-10'
+        blog.save()
+        self.assertEqual(self.client.get(reverse('home_feed')).data['blogs'], [])
+
+    def test_feed_served_from_cache(self):
+        """
+        Test a repeated feed request doesn't query the database.
+        """
+        Vlog.objects.create(title='Girls', video_url='https://example.com/v', author=self.user,
+                            status=True, gender='female')
+        self.client.get(reverse('home_feed'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home_feed'))
+        self.assertEqual(len(response.data['vlogs']), 1)
+
+    def test_feed_cursor_pagination(self):
+        """
+        Test the feed is served in pages linked by an opaque next cursor.
+        """
+        for i in range(5):
+            Blog.objects.create(title=f'Blog {i}', content='...', author=self.user, status=True, gender='female')
+        response = self.client.get(reverse('home_feed'), {'page_size': 2})
+        titles = [blog['title'] for blog in response.data['blogs']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            titles += [blog['title'] for blog in response.data['blogs']]
+        self.assertEqual(titles, [f'Blog {i}' for i in reversed(range(5))])
+
+    def test_unified_feed_interleaves_blogs_and_vlogs(self):
+        """
+        Test the unified feed returns one typed timeline across pages, newest first.
+        """
+        Blog.objects.create(title='First', content='...', author=self.user, status=True, gender='female')
+        Vlog.objects.create(title='Second', video_url='https://example.com/v', author=self.user,
+                            status=True, gender='female')
+        Blog.objects.create(title='Third', content='...', author=self.user, status=True, gender='female')
+        response = self.client.get(reverse('home_feed_unified'), {'page_size': 2})
+        items = [(item['type'], item['title']) for item in response.data['results']]
+        response = self.client.get(response.data['next'])
+        items += [(item['type'], item['title']) for item in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(items, [('blog', 'Third'), ('vlog', 'Second'), ('blog', 'First')])
+
+    def test_streamed_feed_matches_feed(self):
+        """
+        Test the streamed feed contains the same items as the paginated feed.
+        """
+        Blog.objects.create(title='Girls', content='...', author=self.user, status=True, gender='female')
+        Vlog.objects.create(title='Toddlers', video_url='https://example.com/v', author=self.user,
+                            status=True, age_group='1-3')
+        Vlog.objects.create(title='Boys', video_url='https://example.com/v', author=self.user,
+                            status=True, gender='male')
+        response = self.client.get(reverse('home_feed'), {'stream': 1})
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b''.join(response.streaming_content))
+        feed = self.client.get(reverse('home_feed')).json()
+        self.assertEqual(streamed, {'blogs': feed['blogs'], 'vlogs': feed['vlogs']})
+
+    def test_feed_serves_blog_summaries(self):
+        """
+        Test the feed returns a blog's excerpt and word count and the detail view its content.
+        """
+        content = 'word ' * 100
+        blog = Blog.objects.create(title='Girls', content=content, author=self.user, status=True, gender='female')
+        feed_blog = self.client.get(reverse('home_feed')).data['blogs'][0]
+        self.assertNotIn('content', feed_blog)
+        self.assertEqual(feed_blog['word_count'], 100)
+        self.assertTrue(feed_blog['excerpt'].endswith('…'))
+        detail = self.client.get(reverse('detail'), {'bid': blog.id})
+        self.assertEqual(detail.data['content'], content)
+
+    def test_feed_not_modified(self):
+        """
+        Test an unchanged feed answers 304 to its ETag, and 200 once a matching blog changes.
+        """
+        blog = Blog.objects.create(title='Girls', content='...', author=self.user, status=True, gender='female')
+        response = self.client.get(reverse('home_feed'))
+        etag = response['ETag']
+        response = self.client.get(reverse('home_feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        blog.delete()
+        response = self.client.get(reverse('home_feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['blogs'], [])
+
+    def test_if_modified_since_ignored(self):
+        """
+        Test If-Modified-Since alone never answers 304, as a deletion doesn't move the newest updated_at.
+        """
+        Blog.objects.create(title='Kept', content='...', author=self.user, status=True, gender='female')
+        blog = Blog.objects.create(title='Girls', content='...', author=self.user, status=True, gender='female')
+        since = (timezone.now() + timedelta(hours=1)).strftime('%a, %d %b %Y %H:%M:%S GMT')
+        blog.delete()
+        for name in ('home_feed', 'blog-list'):
+            response = self.client.get(reverse(name), HTTP_IF_MODIFIED_SINCE=since)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('Last-Modified', response)
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_feed_authenticated_without_queries(self):
+        """
+        Test a warm feed request resolves the user and their children from the cache.
+        """
+        self.client.get(reverse('home_feed'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home_feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_context_invalidated_on_child_change(self):
+        """
+        Test adding a child changes the feed segments of a cached user.
+        """
+        Blog.objects.create(title='Boys', content='...', author=self.user, status=True, gender='male')
+        Blog.objects.create(title='Girls', content='...', author=self.user, status=True, gender='female')
+        self.assertEqual(len(self.client.get(reverse('home_feed')).data['blogs']), 2)
+        Child.objects.create(user=self.user, name='Test Child', gender='female', date_of_birth='2020-01-01')
+        blogs = self.client.get(reverse('home_feed')).data['blogs']
+        self.assertEqual([blog['title'] for blog in blogs], ['Girls'])
+
+    def test_inactive_user_rejected(self):
+        """
+        Test deactivating a cached user makes their token fail authentication.
+        """
+        self.client.get(reverse('home_feed'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('home_feed'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RevokedTokenFilterTestCase(TestCase):
+    def setUp(self):
+        revoked_tokens.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def test_refresh_without_blacklist_query(self):
+        """
+        Test refreshing a token that isn't revoked doesn't query the blacklist once warmed up.
+        """
+        self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)}, format='json')
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_refresh_rejected_after_logout(self):
+        """
+        Test a refresh token can't be used once the user logged out with it.
+        """
+        self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)}, format='json')
+        response = self.client.post(reverse('logout'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_sync_picks_up_tokens_blacklisted_elsewhere(self):
+        """
+        Test tokens blacklisted by another process are revoked after the next sync.
+        """
+        jti = self.refresh[api_settings.JTI_CLAIM]
+        self.assertNotIn(jti, revoked_tokens)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=jti))
+        revoked_tokens.sync()
+        with self.assertNumQueries(0):
+            self.assertIn(jti, revoked_tokens)
+
+
+class ContentPaginationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def test_blog_list_paginated(self):
+        """
+        Test the blog list returns a page of results and a cursor to the next page.
+        """
+        for i in range(3):
+            Blog.objects.create(title=f'Blog {i}', content='...', author=self.user)
+        response = self.client.get(reverse('blog-list'), {'page_size': 2})
+        self.assertEqual([blog['title'] for blog in response.data['results']], ['Blog 2', 'Blog 1'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([blog['title'] for blog in response.data['results']], ['Blog 0'])
+        self.assertIsNone(response.data['next'])
+
+    def test_blog_list_not_modified(self):
+        """
+        Test the blog list answers 304 with only the validator query.
+        """
+        Blog.objects.create(title='Blog', content='...', author=self.user)
+        etag = self.client.get(reverse('blog-list'))['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('blog-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_blog_list_streamed(self):
+        """
+        Test ?stream=1 returns every blog as one JSON array.
+        """
+        for i in range(3):
+            Blog.objects.create(title=f'Blog {i}', content='...', author=self.user)
+        response = self.client.get(reverse('blog-list'), {'stream': 1, 'page_size': 2})
+        blogs = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([blog['title'] for blog in blogs], ['Blog 2', 'Blog 1', 'Blog 0'])
+
+
+class ValuesSerializerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+
+    def test_matches_model_serializer(self):
+        """
+        Test the values() read path renders the same JSON as the model serializers.
+        """
+        Blog.objects.create(title='Blog', content='Ünïcode content', author=self.user, status=True)
+        Vlog.objects.create(title='Vlog', video_url='https://example.com/v', author=self.user)
+        Child.objects.create(user=self.user, name='Test Child', gender='male', date_of_birth='2020-01-01')
+        for model, serializer_class in ((Blog, BlogSerializer), (Vlog, VlogSerializer), (Child, ChildSerializer)):
+            queryset = model.objects.all()
+            self.assertEqual(
+                JSONRenderer().render(ValuesSerializer(serializer_class).serialize(queryset)),
+                JSONRenderer().render(serializer_class(queryset, many=True).data),
+            )
+
+
+class AsyncViewsTestCase(TransactionTestCase):
+    # Feed queries run on worker threads with their own connections, which can't
+    # see data inside a TestCase transaction. Reads may go to a configured replica.
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        Child.objects.create(user=self.user, name='Test Child', gender='female',
+                             date_of_birth=date.today() - timedelta(days=365 * 2))
+
+    def test_async_feed_matches_feed(self):
+        """
+        Test the async home feed returns the same page as the sync one.
+        """
+        Blog.objects.create(title='Girls', content='...', author=self.user, status=True, gender='female')
+        Vlog.objects.create(title='Toddlers', video_url='https://example.com/v', author=self.user,
+                            status=True, age_group='1-3')
+        response = self.client.get(reverse('async_home_feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        cache.clear()
+        self.assertEqual(response.json(), self.client.get(reverse('home_feed')).json())
+
+    def test_async_detail(self):
+        """
+        Test the async detail view returns a blog and 404s on unknown ids.
+        """
+        blog = Blog.objects.create(title='Blog', content='Full content', author=self.user)
+        response = self.client.get(reverse('async_detail'), {'bid': blog.id})
+        self.assertEqual(response.json()['content'], 'Full content')
+        response = self.client.get(reverse('async_detail'), {'vid': 404})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_requires_authentication(self):
+        """
+        Test the async views reject unauthenticated requests.
+        """
+        self.client.credentials()
+        response = self.client.get(reverse('async_home_feed'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BulkEndpointsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.other = User.objects.create_user(username='otheruser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_blogs(self):
+        """
+        Test creating several blogs in one request, owned by the user and summarized.
+        """
+        data = [{'title': f'Blog {i}', 'content': 'one two three', 'status': True} for i in range(3)]
+        response = self.client.post(reverse('blog-bulk'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Blog.objects.filter(author=self.user, word_count=3).count(), 3)
+        self.assertEqual(len(self.client.get(reverse('home_feed')).data['blogs']), 3)
+
+    def test_bulk_create_reports_item_errors(self):
+        """
+        Test an invalid item rejects the whole payload with its index.
+        """
+        data = [{'title': 'Valid', 'content': '...'}, {'title': 'Missing content'}]
+        response = self.client.post(reverse('blog-bulk'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertEqual(Blog.objects.count(), 0)
+
+    def test_bulk_update_respects_ownership(self):
+        """
+        Test a bulk update can't touch another user's vlog and then applies nothing.
+        """
+        own = Vlog.objects.create(title='Own', video_url='https://example.com/v', author=self.user)
+        other = Vlog.objects.create(title='Other', video_url='https://example.com/v', author=self.other)
+        data = [{'id': own.id, 'title': 'Renamed'}, {'id': other.id, 'title': 'Renamed'}]
+        response = self.client.patch(reverse('vlog-bulk'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['id'], other.id)
+        own.refresh_from_db()
+        self.assertEqual(own.title, 'Own')
+
+        response = self.client.patch(reverse('vlog-bulk'), data[:1], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        own.refresh_from_db()
+        self.assertEqual(own.title, 'Renamed')
+
+    def test_bulk_delete_children(self):
+        """
+        Test deleting several children in one request.
+        """
+        children = [
+            Child.objects.create(user=self.user, name=f'Child {i}', gender='male', date_of_birth='2020-01-01')
+            for i in range(2)
+        ]
+        response = self.client.delete(reverse('child-bulk'), [child.id for child in children], format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Child.objects.count(), 0)
+
+
+class DetailVlogBlogTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.blogs = [Blog.objects.create(title=f'Blog {i}', content='...', author=self.user) for i in range(2)]
+        self.vlog = Vlog.objects.create(title='Vlog', video_url='https://example.com/v', author=self.user)
+
+    def test_single_detail(self):
+        """
+        Test a single id returns the object itself.
+        """
+        response = self.client.get(reverse('detail'), {'vid': self.vlog.id})
+        self.assertEqual(response.data['title'], 'Vlog')
+
+    def test_batched_detail(self):
+        """
+        Test several vlog and blog ids are resolved with one query per model and keyed by id.
+        """
+        blog_ids = ','.join(str(blog.id) for blog in self.blogs)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('detail'), {'vid': f'{self.vlog.id},999', 'bid': blog_ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['vlogs'][self.vlog.id]['title'], 'Vlog')
+        self.assertIsNone(response.data['vlogs'][999])
+        self.assertEqual({blog['title'] for blog in response.data['blogs'].values()}, {'Blog 0', 'Blog 1'})
+
+    def test_detail_not_modified(self):
+        """
+        Test the detail view answers 304 until the object is updated.
+        """
+        response = self.client.get(reverse('detail'), {'vid': self.vlog.id})
+        self.assertNotIn('Last-Modified', response)
+        response = self.client.get(reverse('detail'), {'vid': self.vlog.id}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        etag = response['ETag']
+        self.vlog.title = 'Updated'
+        self.vlog.save()
+        response = self.client.get(reverse('detail'), {'vid': self.vlog.id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data['title'], 'Updated')
+
+    def test_invalid_ids(self):
+        """
+        Test malformed ids are rejected.
+        """
+        response = self.client.get(reverse('detail'), {'bid': '1,x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.sleep_blog = Blog.objects.create(
+            title='Toddler sleep routines', content='Bedtime stories help toddlers sleep.',
+            author=self.user, status=True, age_group='1-3',
+        )
+        self.food_blog = Blog.objects.create(
+            title='First foods', content='Purees before bedtime and sleeping well.',
+            author=self.user, status=True, age_group='0-1',
+        )
+        self.draft = Blog.objects.create(title='Sleep draft', content='sleep', author=self.user)
+        self.vlog = Vlog.objects.create(
+            title='Sleep training', video_url='https://example.com/v', author=self.user, status=True,
+        )
+
+    def search(self, **params):
+        return self.client.get(reverse('search'), params)
+
+    def test_ranked_results(self):
+        """
+        Test published matches are returned tagged with their type, title matches first.
+        """
+        response = self.search(q='sleep')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = [(item['type'], item['id']) for item in response.data['results']]
+        self.assertEqual(set(results[:2]), {('blog', self.sleep_blog.id), ('vlog', self.vlog.id)})
+        self.assertEqual(results[2], ('blog', self.food_blog.id))
+        self.assertNotIn(('blog', self.draft.id), results)
+
+    def test_filters(self):
+        """
+        Test age_group keeps items for that group or all ages, and type narrows to one kind.
+        """
+        response = self.search(q='sleep', age_group='1-3', type='blog')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.sleep_blog.id])
+        response = self.search(q='sleep', age_group='12')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_saves(self):
+        """
+        Test updates, unpublishing and deletes are reflected in the index.
+        """
+        self.food_blog.title = 'Weaning'
+        self.food_blog.content = 'Purees'
+        self.food_blog.save()
+        self.vlog.status = False
+        self.vlog.save()
+        self.sleep_blog.delete()
+        self.assertEqual(self.search(q='sleep').data['results'], [])
+        self.assertEqual(len(self.search(q='weaning').data['results']), 1)
+
+    def test_pagination(self):
+        """
+        Test results are paginated with a next link until the last page.
+        """
+        response = self.search(q='sleep', page_size=2)
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+
+class ImportContentTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='partner', password='testpassword')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+
+    def import_content(self, path, *args):
+        call_command('import_content', path, '--author', 'partner', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_import_jsonl(self):
+        """
+        Test valid JSONL rows are imported, summarized and indexed, and invalid ones skipped.
+        """
+        rows = [
+            {'title': 'Sleep', 'content': 'Naps matter', 'status': True, 'age_group': '1-3'},
+            {'title': '', 'content': 'No title'},
+            {'title': 'Food', 'content': 'Purees', 'age_group': '12'},
+        ]
+        path = self.write('blogs.jsonl', '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n')
+        self.import_content(path, '--model', 'blog')
+        blog = Blog.objects.get()
+        self.assertEqual((blog.title, blog.author, blog.word_count, blog.age_group), ('Sleep', self.user, 2, '1-3'))
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        self.assertEqual(client.get(reverse('search'), {'q': 'naps'}).data['results'][0]['id'], blog.id)
+
+    def test_import_csv(self):
+        """
+        Test CSV rows are imported and empty cells fall back to model defaults.
+        """
+        path = self.write('vlogs.csv', 'title,video_url,status,age_group\nBath time,https://example.com/v,true,\n')
+        self.import_content(path, '--model', 'vlog')
+        vlog = Vlog.objects.get()
+        self.assertEqual((vlog.title, vlog.status, vlog.age_group), ('Bath time', True, 'all'))
+
+    def test_resume(self):
+        """
+        Test an import stopped by an invalid row resumes after its last committed batch.
+        """
+        rows = [json.dumps({'title': f'Blog {i}', 'content': '...'}) for i in range(4)]
+        path = self.write('blogs.jsonl', '\n'.join(rows[:2] + ['{"title": ""}'] + rows[3:]))
+        with self.assertRaises(CommandError):
+            self.import_content(path, '--model', 'blog', '--batch-size', '2', '--strict')
+        self.assertEqual(Blog.objects.count(), 2)
+
+        self.write('blogs.jsonl', '\n'.join(rows))
+        self.import_content(path, '--model', 'blog', '--batch-size', '2', '--resume')
+        self.assertEqual(sorted(Blog.objects.values_list('title', flat=True)), [f'Blog {i}' for i in range(4)])
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+
+class ParentOnboardingTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='admin', password='testpassword')
+        self.client.force_authenticate(user=self.admin)
+        self.parents = [
+            {
+                'username': f'parent{i}', 'email': f'parent{i}@example.com', 'password': 'secret123',
+                'parent_type': 'experienced',
+                'children': [{'name': 'Kid', 'gender': 'female', 'date_of_birth': '2022-05-01'}],
+            }
+            for i in range(2)
+        ]
+
+    def test_bulk_register(self):
+        """
+        Test parents are created with hashed passwords, profiles and children.
+        """
+        response = self.client.post(reverse('register_bulk'), self.parents, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([user['username'] for user in response.data], ['parent0', 'parent1'])
+        user = User.objects.get(username='parent1')
+        self.assertTrue(user.check_password('secret123'))
+        self.assertEqual(user.profile.parent_type, 'experienced')
+        self.assertEqual(user.children.get().date_of_birth, date(2022, 5, 1))
+
+    def test_bulk_register_rejects_duplicates(self):
+        """
+        Test taken or repeated usernames fail the whole request.
+        """
+        self.parents.append({'username': 'admin', 'password': 'secret123'})
+        self.parents.append(dict(self.parents[0]))
+        response = self.client.post(reverse('register_bulk'), self.parents, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 2, 3])
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_bulk_register_size_capped(self):
+        """
+        Test a request onboarding more than ONBOARDING_MAX_ITEMS parents is rejected.
+        """
+        parents = [dict(self.parents[0], username=f'parent{i}') for i in range(11)]
+        response = self.client.post(reverse('register_bulk'), parents, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_bulk_register_requires_admin(self):
+        """
+        Test only staff users can onboard parents.
+        """
+        self.client.force_authenticate(user=User.objects.create_user(username='parent', password='testpassword'))
+        response = self.client.post(reverse('register_bulk'), self.parents, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_onboard_parents_command(self):
+        """
+        Test the command creates the parents of a JSONL file and skips invalid lines.
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as file:
+            file.write('\n'.join(json.dumps(parent) for parent in self.parents) + '\n{"username": ""}\n')
+        self.addCleanup(os.remove, file.name)
+        stderr = StringIO()
+        call_command('onboard_parents', file.name, '--workers', '1', stdout=StringIO(), stderr=stderr)
+        self.assertEqual(Child.objects.filter(user__username__startswith='parent').count(), 2)
+        self.assertIn('Line 3 skipped', stderr.getvalue())
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        Blog.objects.create(title='Blog', content='...', author=self.user)
+
+    def test_metrics_by_view(self):
+        """
+        Test requests are recorded under their view and action and scraped as Prometheus text.
+        """
+        self.client.get(reverse('blog-list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = response.content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="BlogViewSet.list",method="GET",status="200"} 1', metrics)
+        self.assertIn('http_request_db_queries_count{view="BlogViewSet.list"} 1', metrics)
+        self.assertIn('http_response_render_duration_seconds_count{view="BlogViewSet.list"} 1', metrics)
+        self.assertIn('http_response_size_bytes_bucket{view="BlogViewSet.list",le="+Inf"} 1', metrics)
+
+    @override_settings(METRICS={**settings.METRICS, 'TOKEN': 'scrape-token'})
+    def test_metrics_token(self):
+        """
+        Test a configured token is required to scrape the metrics.
+        """
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS={**settings.METRICS, 'SLOW_QUERY_MS': 0})
+    def test_slow_query_log(self):
+        """
+        Test queries over the slow query threshold are logged with their view.
+        """
+        with self.assertLogs('blog.metrics', 'WARNING') as logs:
+            self.client.get(reverse('blog-list'))
+        self.assertIn('BlogViewSet.list', logs.output[0])
+
+    def test_serialization_and_authentication_timed(self):
+        """
+        Test serialization and authentication are timed apart from the queries they run.
+        """
+        cache.clear()
+        Child.objects.create(user=self.user, name='Child', gender='female',
+                             date_of_birth=date.today() - timedelta(days=365 * 2))
+        Blog.objects.create(title='Girls', content='...', author=self.user, status=True, gender='female')
+        self.client.force_authenticate(user=None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.client.get(reverse('blog-list'))
+        self.client.get(reverse('home_feed'))
+        metrics = self.client.get(reverse('metrics')).content.decode()
+        for view in ('BlogViewSet.list', 'HomeFeedView'):
+            self.assertIn(f'http_request_serialization_duration_seconds_count{{view="{view}"}} 1', metrics)
+            self.assertIn(f'http_request_authentication_duration_seconds_count{{view="{view}"}} 1', metrics)
+
+    def test_metrics_added_up_across_processes(self):
+        """
+        Test the metrics other workers wrote to the shared directory are added to this process's.
+        """
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS={**settings.METRICS, 'MULTIPROCESS_DIR': directory, 'FLUSH_SECONDS': 3600}):
+            self.client.get(reverse('blog-list'))
+            snapshots.write()
+            with open(os.path.join(directory, snapshots.filename)) as file:
+                written = file.read()
+            with open(os.path.join(directory, 'other-worker.json'), 'w') as file:
+                file.write(written)
+            metrics = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="BlogViewSet.list",method="GET",status="200"} 2', metrics)
+
+
+class ChildAgeGroupTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.born = date.today() - timedelta(days=365 * 3 + 10)
+        self.child = Child.objects.create(user=self.user, name='Kid', gender='other', date_of_birth=self.born)
+
+    def test_bucket_stored_on_save(self):
+        """
+        Test a child's age group and next bucket boundary are stored on save.
+        """
+        self.assertEqual(self.child.age_group, '1-3')
+        self.assertEqual(self.child.next_age_group_on, self.born + timedelta(days=365 * 4))
+        self.child.date_of_birth = date.today() - timedelta(days=365 * 12)
+        self.child.save(update_fields=['date_of_birth'])
+        self.child.refresh_from_db()
+        self.assertEqual((self.child.age_group, self.child.next_age_group_on), ('all', None))
+
+    def test_rebucket_children(self):
+        """
+        Test the command moves children past their boundary and the feed follows.
+        """
+        Blog.objects.create(title='Preschool', content='...', author=self.user, status=True, age_group='3-7')
+        self.assertEqual(self.client.get(reverse('home_feed')).data['blogs'], [])
+
+        out = StringIO()
+        call_command('rebucket_children', '--date', self.child.next_age_group_on.isoformat(), stdout=out)
+        self.assertIn('Rebucketed 1 children', out.getvalue())
+        self.child.refresh_from_db()
+        self.assertEqual(self.child.age_group, '3-7')
+        self.assertEqual(self.child.next_age_group_on, self.born + timedelta(days=365 * 8))
+        self.assertEqual([blog['title'] for blog in self.client.get(reverse('home_feed')).data['blogs']], ['Preschool'])
+
+    def test_bulk_create_sets_bucket(self):
+        """
+        Test children created through the bulk endpoint get their age group.
+        """
+        data = [{'name': 'Baby', 'gender': 'male', 'date_of_birth': date.today().isoformat()}]
+        self.client.post(reverse('child-bulk'), data, format='json')
+        self.assertEqual(Child.objects.get(name='Baby').age_group, '0-1')
+
+
+@override_settings(FEED_MODE='push', FEED_FANOUT_BACKGROUND=False)
+class FeedInboxTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author', password='testpassword')
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.other = User.objects.create_user(username='otheruser', password='testpassword')
+        Child.objects.create(user=self.user, name='Baby', gender='female', date_of_birth=date.today())
+        Child.objects.create(user=self.other, name='Teen', gender='male', date_of_birth=date.today() - timedelta(days=365 * 12))
+        self.client.force_authenticate(user=self.user)
+
+    def entries(self, user):
+        return set(FeedEntry.objects.filter(user=user).values_list('kind', 'item_id'))
+
+    def test_publish_fans_out_to_matching_parents(self):
+        """
+        Test publishing writes entries for parents whose children see the item and unpublishing removes them.
+        """
+        blog = Blog.objects.create(title='Baby sleep', content='...', author=self.author, age_group='0-1', gender='female')
+        self.assertFalse(FeedEntry.objects.exists())
+        blog.status = True
+        blog.save()
+        self.assertEqual(self.entries(self.user), {('blog', blog.pk)})
+        self.assertEqual(self.entries(self.other), set())
+
+        vlog = Vlog.objects.create(title='For all', video_url='https://example.com/v', author=self.author, status=True)
+        self.assertEqual(self.entries(self.other), {('vlog', vlog.pk)})
+        blog.status = False
+        blog.save()
+        self.assertEqual(self.entries(self.user), set())
+        vlog.delete()
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_push_feed_matches_pull_feed(self):
+        """
+        Test both home feeds read from the inbox return the pull feed's pages and cursors.
+        """
+        for i in range(5):
+            Blog.objects.create(title=f'Blog {i}', content='...', author=self.author, status=True,
+                                age_group='0-1' if i % 2 else '3-7', gender='male')
+            Vlog.objects.create(title=f'Vlog {i}', video_url='https://example.com/v', author=self.author,
+                                status=True, gender='female' if i % 2 else 'male')
+        for name in ('home_feed', 'home_feed_unified'):
+            url = reverse(name) + '?page_size=1'
+            pages = []
+            for mode in ('push', 'pull'):
+                with self.settings(FEED_MODE=mode):
+                    response = self.client.get(url)
+                    pages.append([response.data, self.client.get(response.data['next']).data])
+            self.assertEqual(pages[0], pages[1])
+
+    def test_push_feed_validated_from_inbox(self):
+        """
+        Test push feeds answer 304 without building the pull segment feeds, and 200 once a listed item is edited.
+        """
+        blog = Blog.objects.create(title='Baby sleep', content='...', author=self.author, status=True, gender='female')
+        for name in ('home_feed', 'home_feed_unified'):
+            cache.clear()
+            response = self.client.get(reverse(name))
+            response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertIsNone(cache.get(segment_key(('0-1', 'female'))))
+
+            Blog.objects.filter(pk=blog.pk).update(title=f'Edited for {name}', updated_at=timezone.now())
+            response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn(f'Edited for {name}', response.content.decode())
+
+    def test_child_changes_and_backfill_rebuild_inboxes(self):
+        """
+        Test adding a child rebuilds the parent's inbox and backfill_feed_inbox rebuilds every inbox.
+        """
+        blog = Blog.objects.create(title='Teen talk', content='...', author=self.author, status=True, gender='male')
+        self.assertEqual(self.entries(self.user), set())
+        Child.objects.create(user=self.user, name='Brother', gender='male', date_of_birth=date.today())
+        self.assertEqual(self.entries(self.user), {('blog', blog.pk)})
+
+        FeedEntry.objects.all().delete()
+        out = StringIO()
+        call_command('backfill_feed_inbox', stdout=out)
+        self.assertIn('Rebuilt 3 inboxes with 2 entries', out.getvalue())
+        self.assertEqual(self.entries(self.other), {('blog', blog.pk)})
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTestCase(TransactionTestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Without a configured replica, a second connection to the test
+        # database stands in for one.
+        cls.added_replica = 'replica' not in connections.settings
+        if cls.added_replica:
+            connections.settings['replica'] = {**connections['default'].settings_dict, 'TEST': {'MIRROR': 'default'}}
+        # A replica that never receives the primary's writes.
+        cls.stale_replica_dir = tempfile.TemporaryDirectory()
+        connections.settings['stale'] = {
+            **connections['default'].settings_dict,
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.stale_replica_dir.name, 'stale.sqlite3'),
+            'TEST': {},
+        }
+        call_command('migrate', database='stale', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        for alias in ['stale', 'replica'] if cls.added_replica else ['stale']:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        cls.stale_replica_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def replica_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 400)
+        return len(queries)
+
+    def test_reads_go_to_replica(self):
+        """
+        Test search and list requests read from the replica.
+        """
+        Blog.objects.create(title='Blog', content='...', author=self.user, status=True)
+        self.assertGreater(self.replica_queries('get', reverse('search') + '?q=blog'), 0)
+        self.assertGreater(self.replica_queries('get', reverse('blog-list')), 0)
+
+    @override_settings(DATABASE_REPLICAS=['stale'])
+    def test_cached_reads_use_primary(self):
+        """
+        Test feeds, details and user contexts cached on replica requests are read from the primary.
+        """
+        blog = Blog.objects.create(title='Fresh', content='...', author=self.user, status=True)
+        with CaptureQueriesContext(connections['stale']) as queries:
+            feed = self.client.get(reverse('home_feed'))
+            detail = self.client.get(reverse('detail'), {'bid': blog.pk})
+            blogs = self.client.get(reverse('blog-list'))
+        self.assertEqual([item['title'] for item in feed.data['blogs']], ['Fresh'])
+        self.assertEqual(detail.data['title'], 'Fresh')
+        # Uncached reads are still served by the (stale) replica.
+        self.assertGreater(len(queries), 0)
+        self.assertEqual(blogs.data['results'], [])
+
+    def test_writer_is_pinned_to_primary(self):
+        """
+        Test a user who wrote reads from the primary until the pin expires, while other users keep the replica.
+        """
+        self.assertEqual(self.replica_queries('post', reverse('blog-list'), {'title': 'New', 'content': '...'}), 0)
+        self.assertEqual(self.replica_queries('get', reverse('blog-list')), 0)
+
+        other = User.objects.create_user(username='otheruser', password='testpassword')
+        self.client.force_authenticate(user=other)
+        self.assertGreater(self.replica_queries('get', reverse('blog-list')), 0)
+
+        self.client.force_authenticate(user=self.user)
+        cache.clear()
+        self.assertGreater(self.replica_queries('get', reverse('blog-list')), 0)
+
+
+@override_settings(DETAIL_CACHE={**settings.DETAIL_CACHE, 'ENABLED': True})
+class DetailCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.blog = Blog.objects.create(title='Popular', content='...', author=self.user, status=True)
+
+    def test_detail_read_through(self):
+        """
+        Test repeated detail reads are served from the cache until the object is saved.
+        """
+        self.client.get(reverse('detail'), {'bid': self.blog.id})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('detail'), {'bid': self.blog.id})
+        self.assertEqual(response.data['title'], 'Popular')
+
+        self.blog.title = 'Edited'
+        self.blog.save()
+        self.assertEqual(self.client.get(reverse('detail'), {'bid': self.blog.id}).data['title'], 'Edited')
+        pk = self.blog.id
+        self.blog.delete()
+        self.assertEqual(self.client.get(reverse('detail'), {'bid': pk}).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_single_flight(self):
+        """
+        Test a request finding a payload being recomputed waits for it instead of loading it again.
+        """
+        key = payload_key('blog', self.blog.id, cache.get(version_key('blog', self.blog.id)))
+        cache.add(lock_key(key), True, 5)
+        recompute = threading.Timer(0.05, lambda: cache.set(key, {'id': self.blog.id, 'title': 'Recomputed'}))
+        recompute.start()
+        items = get_details('blog', [self.blog.id], lambda pks: self.fail('Payload loaded twice.'))
+        recompute.join()
+        self.assertEqual(items[self.blog.id]['title'], 'Recomputed')
+
+    def test_local_tier_is_bounded(self):
+        """
+        Test the in-process tier evicts its least recently used entry.
+        """
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+
+    @override_settings(DETAIL_CACHE={**settings.DETAIL_CACHE, 'ENABLED': False})
+    def test_disabled_without_shared_cache(self):
+        """
+        Test every detail read loads the object when the cache is not shared between processes.
+        """
+        self.client.get(reverse('detail'), {'bid': self.blog.id})
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('detail'), {'bid': self.blog.id})
+        self.assertEqual(response.data['title'], 'Popular')
+
+
+class SparseFieldsetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.blog = Blog.objects.create(title='Blog', content='Long text', author=self.user, status=True)
+        self.vlog = Vlog.objects.create(title='Vlog', video_url='https://example.com/v', author=self.user, status=True)
+
+    def test_viewset_fields_narrow_columns(self):
+        """
+        Test fields= trims list and retrieve output and the columns selected.
+        """
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(reverse('blog-list'), {'fields': 'id,title'})
+        self.assertEqual(response.data['results'], [{'id': self.blog.id, 'title': 'Blog'}])
+        self.assertNotIn('excerpt', queries[-1]['sql'])
+
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(reverse('blog-detail', args=[self.blog.id]), {'exclude': 'content'})
+        self.assertNotIn('content', response.data)
+        self.assertIn('"title"', queries[-1]['sql'])
+        self.assertNotIn('"content"', queries[-1]['sql'])
+
+    def test_feed_and_detail_fields(self):
+        """
+        Test fields= trims the home feeds and the detail endpoint, and unknown names are rejected.
+        """
+        card = {'fields': 'id,title,published_at,age_group'}
+        response = self.client.get(reverse('home_feed'), card)
+        self.assertEqual(set(response.data['blogs'][0]), {'id', 'title', 'published_at', 'age_group'})
+        self.assertEqual(set(response.data['vlogs'][0]), {'id', 'title', 'published_at', 'age_group'})
+        response = self.client.get(reverse('home_feed_unified'), {'fields': 'title'})
+        self.assertEqual(response.data['results'], [{'type': 'vlog', 'title': 'Vlog'}, {'type': 'blog', 'title': 'Blog'}])
+
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(reverse('home_feed'), {'fields': 'id,title', 'stream': '1'})
+            body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(body['vlogs'], [{'id': self.vlog.id, 'title': 'Vlog'}])
+        self.assertFalse(any('video_url' in query['sql'] for query in queries))
+
+        response = self.client.get(reverse('detail'), {'bid': self.blog.id, 'exclude': 'content'})
+        self.assertNotIn('content', response.data)
+        full = self.client.get(reverse('detail'), {'bid': self.blog.id})
+        self.assertNotEqual(response['ETag'], full['ETag'])
+        self.assertEqual(self.client.get(reverse('home_feed'), {'fields': 'secret'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_documented_excludes(self):
+        """
+        Test the readme's exclude example works on the feeds and the blog list.
+        """
+        for name in ('home_feed', 'home_feed_unified', 'blog-list'):
+            response = self.client.get(reverse(name), {'exclude': 'excerpt,word_count'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('"excerpt"', response.content.decode())
+            self.assertIn('"title"', response.content.decode())
+
+
+class RenderingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        for i in range(30):
+            Blog.objects.create(title=f'Blog {i} \u2028 é', content='Sleep routines. ' * 50, author=self.user, status=True)
+
+    def test_orjson_matches_drf_json(self):
+        """
+        Test the orjson renderer outputs the same bytes as DRF's JSONRenderer.
+        """
+        response = self.client.get(reverse('home_feed'))
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        response = self.client.get(reverse('detail'), {'bid': Blog.objects.first().id})
+        self.assertEqual(ORJSONRenderer().render(response.data), JSONRenderer().render(response.data))
+
+    def test_orjson_non_finite_numbers_left_to_drf(self):
+        """
+        Test NaN and infinite numbers are rejected under STRICT_JSON as DRF does, not rendered as null.
+        """
+        for value in (float('nan'), float('inf'), Decimal('-Infinity')):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({'next': None, 'score': [value]})
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render({'next': None, 'score': [value]})
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_negotiated(self):
+        """
+        Test Accept: application/msgpack returns the feed as MessagePack.
+        """
+        response = self.client.get(reverse('home_feed'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(JSONRenderer().render(response.data)))
+
+    def test_compression(self):
+        """
+        Test large API responses are compressed as the client accepts, and small or HTML ones are not.
+        """
+        identity = self.client.get(reverse('home_feed'))
+        response = self.client.get(reverse('home_feed'), HTTP_ACCEPT_ENCODING='gzip;q=1, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+        if brotli is not None:
+            response = self.client.get(reverse('home_feed'), HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(brotli.decompress(response.content), identity.content)
+
+        small = self.client.get(reverse('child-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+        html = self.client.get(reverse('home_feed'), HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertGreater(len(html.content), 1024)
+        self.assertFalse(html.has_header('Content-Encoding'))
+
+    def test_streamed_response_compressed(self):
+        """
+        Test a streamed feed is compressed chunk by chunk into the same body.
+        """
+        identity = b''.join(self.client.get(reverse('home_feed'), {'stream': 1}).streaming_content)
+        response = self.client.get(reverse('home_feed'), {'stream': 1}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), identity)
+        if brotli is not None:
+            response = self.client.get(reverse('home_feed'), {'stream': 1}, HTTP_ACCEPT_ENCODING='br')
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertEqual(brotli.decompress(b''.join(response.streaming_content)), identity)
+
+
+class RankedFeedTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        Child.objects.create(user=self.user, name='Test Child', gender='female',
+                             date_of_birth=date.today() - timedelta(days=365 * 2))
+
+    def test_ranked_feed_orders_by_relevance(self):
+        """
+        Test the ranked feed returns the page_size best matches for the child, best first.
+        """
+        Blog.objects.create(title='Toddler girls', content='...', author=self.user, status=True,
+                            age_group='1-3', gender='female')
+        Vlog.objects.create(title='Toddlers', video_url='https://example.com/v', author=self.user,
+                            status=True, age_group='1-3')
+        Blog.objects.create(title='Baby girls', content='...', author=self.user, status=True,
+                            age_group='0-1', gender='female')
+        Blog.objects.create(title='Boys', content='...', author=self.user, status=True, gender='male')
+        response = self.client.get(reverse('home_feed_ranked'), {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        items = [(item['type'], item['title']) for item in response.data['results']]
+        self.assertEqual(items, [('blog', 'Toddler girls'), ('vlog', 'Toddlers')])
+
+    def test_etag_counts_children_sharing_a_segment(self):
+        """
+        Test another child in an existing segment changes the ranked feed's ETag and ranking.
+        """
+        Child.objects.create(user=self.user, name='Older Child', gender='male',
+                             date_of_birth=date.today() - timedelta(days=365 * 8))
+        Blog.objects.create(title='Toddlers', content='...', author=self.user, status=True,
+                            age_group='1-3', gender='female')
+        Blog.objects.create(title='School', content='...', author=self.user, status=True,
+                            age_group='7-10', gender='male')
+        response = self.client.get(reverse('home_feed_ranked'), {'page_size': 1})
+        self.assertEqual([item['title'] for item in response.data['results']], ['School'])
+
+        Child.objects.create(user=self.user, name='Twin', gender='female',
+                             date_of_birth=date.today() - timedelta(days=365 * 2))
+        response = self.client.get(reverse('home_feed_ranked'), {'page_size': 1}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['title'] for item in response.data['results']], ['Toddlers'])
+
+    def test_parent_type_weighs_recency(self):
+        """
+        Test an older exact match outranks a new gender match for first-time parents only.
+        """
+        now = timezone.now()
+        feed = {
+            'blogs': [
+                {'id': 1, 'published_at': now.isoformat(), 'age_group': '0-1', 'gender': 'female'},
+                {'id': 2, 'published_at': (now - timedelta(days=7)).isoformat(), 'age_group': '1-3', 'gender': 'female'},
+            ],
+            'vlogs': [],
+        }
+        children = [('1-3', 'female')]
+        first_time = ranking.rank_feed(feed, children, 'first-time', 2, now)
+        experienced = ranking.rank_feed(feed, children, 'experienced', 2, now)
+        self.assertEqual([item['id'] for item in first_time], [2, 1])
+        self.assertEqual([item['id'] for item in experienced], [1, 2])
+
+    @skipUnless(ranking.numpy, 'numpy is not installed')
+    def test_numpy_ranking_matches_python(self):
+        """
+        Test NumPy scoring and top-k selection rank like the pure Python fallback, ties included.
+        """
+        now = timezone.now()
+        ages = [value for value, _ in AGE_GROUP_CHOICES]
+        genders = [value for value, _ in GENDER_CHOICES]
+        feed = {name: [
+            {'id': i, 'published_at': (now - timedelta(hours=i % 40)).isoformat(),
+             'age_group': ages[i % len(ages)], 'gender': genders[i % 7 % len(genders)]}
+            for i in range(300)
+        ] for name in ('blogs', 'vlogs')}
+        children = [('1-3', 'female'), ('7-10', 'male')]
+        ranked = ranking.rank_feed(feed, children, 'experienced', 25, now)
+        with mock.patch.object(ranking, 'numpy', None):
+            fallback = ranking.rank_feed(feed, children, 'experienced', 25, now)
+        self.assertEqual([(item['type'], item['id']) for item in ranked],
+                         [(item['type'], item['id']) for item in fallback])
@@ -0,0 +1,40 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .blacklist import revoked_tokens
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    RefreshToken checking the in-process revoked token filter rather than
+    querying the blacklist tables on every use.
+    """
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in revoked_tokens:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        revoked_tokens.add(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload['exp']))
+        return result
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+class TokenVerifySerializer(jwt_serializers.TokenVerifySerializer):
+
+    def validate(self, attrs):
+        token = tokens.UntypedToken(attrs['token'])
+        if api_settings.BLACKLIST_AFTER_ROTATION:
+            jti = token.get(api_settings.JTI_CLAIM)
+            if jti is not None and jti in revoked_tokens:
+                raise ValidationError(_("Token is blacklisted"))
+        return {}
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserProfileViewSet, ChildViewSet, BlogViewSet, VlogViewSet, HomeFeedView, LogoutView, RegisterView, DetailVlogBlogView
+from .views import UserProfileViewSet, ChildViewSet, BlogViewSet, VlogViewSet, HomeFeedView, UnifiedHomeFeedView, RankedHomeFeedView, LogoutView, RegisterView, BulkRegisterView, DetailVlogBlogView, SearchView, AsyncHomeFeedView, AsyncDetailVlogBlogView
 
 router = DefaultRouter()
 router.register(r'userprofiles', UserProfileViewSet)
@@ -11,7 +11,13 @@ router.register(r'vlogs', VlogViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('home-feed/', HomeFeedView.as_view(), name='home_feed'),
+    path('home-feed/unified/', UnifiedHomeFeedView.as_view(), name='home_feed_unified'),
+    path('home-feed/ranked/', RankedHomeFeedView.as_view(), name='home_feed_ranked'),
     path('detail/', DetailVlogBlogView.as_view(), name='detail'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('async/home-feed/', AsyncHomeFeedView.as_view(), name='async_home_feed'),
+    path('async/detail/', AsyncDetailVlogBlogView.as_view(), name='async_detail'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('register/', RegisterView.as_view(), name='register'),
+    path('register/bulk/', BulkRegisterView.as_view(), name='register_bulk'),
 ]
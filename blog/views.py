@@ -1,15 +1,32 @@
 from rest_framework import viewsets
 from .models import *
 from .serializers import *
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.exceptions import PermissionDenied, APIException, MethodNotAllowed, NotAuthenticated, ParseError, ValidationError
 from rest_framework import generics, status
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
+from rest_framework.request import Request
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
-from datetime import date
-from django.db.models import Q
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, router
+from .authentication import CachedJWTAuthentication, user_context, invalidate_user_context
+from .bulk import BulkModelMixin
+from .cache import get_feed, aget_feed, get_feed_validators, feed_queryset, children_segments, invalidate_items
+from .conditional import ConditionalListMixin, conditional_response, make_etag
+from .detail_cache import get_details, invalidate_details
+from .fieldsets import SparseFieldsetMixin, parse_fieldset, trim
+from .inbox import feed_page, merged_page, push_enabled, items_changed, children_changed
+from .tokens import RefreshToken
+from .onboarding import validate_parents, create_parents
+from .pagination import ContentCursorPagination, FeedCursorPagination, SearchPagination
+from .ranking import rank_feed
+from .renderers import ORJSONRenderer
+from .replicas import ReplicaReadMixin, aread_from_replica
+from .search import index_items, search
+from .streaming import StreamingListMixin, wants_stream, iter_json_array, iter_json_object, streaming_json_response
 
 
 class RegisterView(generics.CreateAPIView):
@@ -27,6 +44,26 @@ class RegisterView(generics.CreateAPIView):
             }
         }, status=status.HTTP_201_CREATED)
 
+class BulkRegisterView(APIView):
+    """
+    Onboard a list of parents, each a /api/register/ payload with an optional
+    ``children`` list. All of them are created, or none if any is invalid.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            raise ValidationError({'detail': 'Expected a list of items.'})
+        if len(request.data) > settings.ONBOARDING_MAX_ITEMS:
+            raise ValidationError({'detail': f'At most {settings.ONBOARDING_MAX_ITEMS} items per request.'})
+        validated, errors = validate_parents(request.data)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        # Passwords are hashed inline: a process pool per request would fork
+        # inside the web worker. Larger imports go through onboard_parents.
+        users = create_parents(validated)
+        return Response(UserSerializer(users, many=True).data, status=status.HTTP_201_CREATED)
+
 class LogoutView(APIView):
     def post(self, request):
         try:
@@ -37,7 +74,7 @@ class LogoutView(APIView):
         except Exception as e:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
@@ -55,14 +92,23 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You do not have permission to delete this profile.")
         instance.delete()
 
-class ChildViewSet(viewsets.ModelViewSet):
+class ChildViewSet(ReplicaReadMixin, BulkModelMixin, viewsets.ModelViewSet):
     queryset = Child.objects.all()
     serializer_class = ChildSerializer
     permission_classes = [IsAuthenticated]
+    owner_field = 'user'
+    bulk_derived_fields = ['age_group', 'next_age_group_on']
 
     def get_queryset(self):
         return Child.objects.filter(user=self.request.user)
 
+    def prepare_bulk_instance(self, instance):
+        instance.update_age_group()
+
+    def bulk_written(self, instances, previous=()):
+        invalidate_user_context(self.request.user.pk)
+        children_changed(self.request.user.pk)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -76,13 +122,33 @@ class ChildViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You do not have permission to delete this child.")
         instance.delete()
 
-class BlogViewSet(viewsets.ModelViewSet):
+class BlogViewSet(ReplicaReadMixin, SparseFieldsetMixin, ConditionalListMixin, StreamingListMixin, BulkModelMixin, viewsets.ModelViewSet):
     queryset = Blog.objects.all()
     serializer_class = BlogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ContentCursorPagination
+    owner_field = 'author'
+    bulk_derived_fields = ['excerpt', 'word_count']
 
     def get_queryset(self):
-        return Blog.objects.filter(author=self.request.user)
+        queryset = Blog.objects.filter(author=self.request.user)
+        if self.action == 'list':
+            queryset = queryset.defer('content')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return BlogSummarySerializer
+        return BlogSerializer
+
+    def prepare_bulk_instance(self, instance):
+        instance.update_summary()
+
+    def bulk_written(self, instances, previous=()):
+        invalidate_items(*instances, *previous)
+        invalidate_details(*instances)
+        index_items(*instances)
+        items_changed(*instances)
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -97,14 +163,22 @@ class BlogViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You do not have permission to delete this blog.")
         instance.delete()
 
-class VlogViewSet(viewsets.ModelViewSet):
+class VlogViewSet(ReplicaReadMixin, SparseFieldsetMixin, ConditionalListMixin, StreamingListMixin, BulkModelMixin, viewsets.ModelViewSet):
     queryset = Vlog.objects.all()
     serializer_class = VlogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ContentCursorPagination
+    owner_field = 'author'
 
     def get_queryset(self):
         return Vlog.objects.filter(author=self.request.user)
 
+    def bulk_written(self, instances, previous=()):
+        invalidate_items(*instances, *previous)
+        invalidate_details(*instances)
+        index_items(*instances)
+        items_changed(*instances)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -118,65 +192,351 @@ class VlogViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You do not have permission to delete this vlog.")
         instance.delete()
 
-class HomeFeedView(APIView):
+class FeedFieldsetMixin:
+    """
+    ``?fields=``/``?exclude=`` for the home feeds, over the fields of blog
+    summaries and vlogs. Cached feeds are trimmed after pagination; streamed
+    feeds only read the selected columns.
+    """
+    # (list name, model, values serializer of its items)
+    feed_lists = [
+        ('blogs', Blog, blog_summary_values_serializer),
+        ('vlogs', Vlog, vlog_values_serializer),
+    ]
+
+    def get_fieldset(self, request):
+        available = dict.fromkeys(
+            name for _, _, values_serializer in self.feed_lists for name in values_serializer.field_names
+        )
+        return parse_fieldset(request, list(available))
+
+    def trim_page(self, page, fieldset, keep=()):
+        if fieldset is None:
+            return page
+        return {name: [trim(item, fieldset, keep) for item in items] for name, items in page.items()}
+
+class HomeFeedView(ReplicaReadMixin, FeedFieldsetMixin, APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = FeedCursorPagination
+    # Fields kept on items however the fieldset trims them.
+    keep_fields = ()
 
-    def get_age_group(self, child):
-        today = date.today()
-        age = (today - child.date_of_birth).days // 365
-        if age <= 1:
-            return '0-1'
-        elif age <= 3:
-            return '1-3'
-        elif age <= 7:
-            return '3-7'
-        elif age <= 10:
-            return '7-10'
-        else:
-            return 'all'
-
-    def get(self, request, *args, **kwargs):
-        user = request.user
-        
-        children = Child.objects.filter(user=user)
-
-        blogs = Blog.objects.none()
-        vlogs = Vlog.objects.none()
+    def get_segments(self, request):
+        return children_segments(user_context(request.user)['children'])
 
-        if children.exists():
-            for child in children:
-                age_group = self.get_age_group(child)
-                gender = child.gender
+    def uses_inbox(self, segments):
+        # Parents without children read the shared everything feed either way.
+        return push_enabled() and bool(segments)
 
-                blogs = blogs | Blog.objects.filter(Q(age_group=age_group) | Q(gender=gender), status=True)
-                vlogs = vlogs | Vlog.objects.filter(Q(age_group=age_group) | Q(gender=gender), status=True)        
-        else:
-            blogs = Blog.objects.filter(status=True)
-            vlogs = Vlog.objects.filter(status=True)
-
-        blog_serializer = BlogSerializer(blogs, many=True)
-        vlog_serializer = VlogSerializer(vlogs, many=True)
-
-        return Response({
-            'blogs': blog_serializer.data,
-            'vlogs': vlog_serializer.data,
-        })
-
-class DetailVlogBlogView(APIView):
+    def get(self, request, *args, **kwargs):
+        segments = self.get_segments(request)
+        fieldset = self.get_fieldset(request)
+        if self.uses_inbox(segments) and not wants_stream(request):
+            return self.get_inbox_response(request, fieldset)
+        # Validators come from per-segment metadata, so an unchanged feed is
+        # answered with 304 without loading, paginating or rendering it.
+        etag_basis = self.get_etag_basis(request, segments, get_feed_validators(segments))
+        etag = make_etag(type(self).__name__, etag_basis, request.GET.urlencode())
+        return conditional_response(
+            request, etag, lambda: self.get_feed_response(request, segments, fieldset),
+        )
+
+    def get_etag_basis(self, request, segments, etag_basis):
+        return etag_basis
+
+    def get_inbox_response(self, request, fieldset=None):
+        # A page is one range scan of the inbox plus one query per kind, so it
+        # is read first and validated by its items' ids and updated_at (edits
+        # don't touch the entries) rather than by building the pull feeds.
+        paginator = self.pagination_class()
+        page = self.inbox_page(request, paginator)
+        versions = {
+            name: [(item.get('type'), item['id'], item['updated_at']) for item in items]
+            for name, items in page.items()
+        }
+        etag = make_etag(type(self).__name__, versions, paginator.next_link, request.GET.urlencode())
+        return conditional_response(
+            request, etag,
+            lambda: paginator.get_paginated_response(self.trim_page(page, fieldset, keep=self.keep_fields)),
+        )
+
+    def inbox_page(self, request, paginator):
+        return feed_page(request.user, paginator, request)
+
+    def get_feed_response(self, request, segments, fieldset=None):
+        if wants_stream(request):
+            return self.stream(segments, fieldset)
+        paginator = self.pagination_class()
+        page = paginator.paginate_feed(get_feed(segments), request)
+        return paginator.get_paginated_response(self.trim_page(page, fieldset, keep=self.keep_fields))
+
+    def stream(self, segments, fieldset=None):
+        # The whole feed straight from database cursors, bypassing the cache
+        # and pagination, with memory bounded by the iterator chunk size.
+        members = []
+        for name, model, values_serializer in self.feed_lists:
+            if fieldset is not None:
+                values_serializer = values_serializer.restrict(fieldset)
+            members.append((name, iter_json_array(
+                values_serializer.rows(feed_queryset(model, segments)),
+                values_serializer.row_converter(),
+            )))
+        return streaming_json_response(iter_json_object(members))
+
+class UnifiedHomeFeedView(HomeFeedView):
+    """
+    Home feed as a single timeline of blogs and vlogs, newest first.
+    """
+
+    keep_fields = ('type',)
+
+    def inbox_page(self, request, paginator):
+        return merged_page(request.user, paginator, request)
+
+    def get_feed_response(self, request, segments, fieldset=None):
+        paginator = self.pagination_class()
+        feed = get_feed(segments)
+        page = paginator.paginate_merged({'blog': feed['blogs'], 'vlog': feed['vlogs']}, request)
+        return paginator.get_paginated_response(self.trim_page(page, fieldset, keep=self.keep_fields))
+
+class RankedHomeFeedView(HomeFeedView):
+    """
+    The ``page_size`` items of the home feed most relevant to the user's
+    children and parent type, best first, instead of every item by date.
+    """
+
+    keep_fields = ('type',)
+
+    def uses_inbox(self, segments):
+        # Every candidate is scored, so they are read from the segment feeds.
+        return False
+
+    def get_segments(self, request):
+        # Read once per request; the ranking also needs the parent type.
+        self.context = user_context(request.user)
+        return children_segments(self.context['children'])
+
+    def get_etag_basis(self, request, segments, etag_basis):
+        # Every child adds to the scores, so children sharing a segment
+        # change the ranking even though the segments stay the same.
+        return [etag_basis, sorted(self.context['children']), self.context['parent_type']]
+
+    def get_feed_response(self, request, segments, fieldset=None):
+        size = self.pagination_class().get_page_size(request)
+        results = rank_feed(get_feed(segments), self.context['children'], self.context['parent_type'], size)
+        return Response(self.trim_page({'results': results}, fieldset, keep=self.keep_fields))
+
+class DetailLookupMixin:
+    """
+    Parses ``vid``/``bid``, each a single id or a comma-separated list. With one
+    id the object itself is returned; with several ids, or both parameters,
+    the response maps ``vlogs`` and ``blogs`` to {id: object or null}, read
+    with one query per model.
+    """
+    # (query parameter, response key, model, values serializer)
+    lookups = [
+        ('vid', 'vlogs', Vlog, vlog_values_serializer),
+        ('bid', 'blogs', Blog, blog_values_serializer),
+    ]
+
+    def parse_ids(self, request):
+        ids = {}
+        for param, *_ in self.lookups:
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    ids[param] = list(dict.fromkeys(int(pk) for pk in value.split(',')))
+                except ValueError:
+                    raise ParseError(f'{param} must be an id or a comma-separated list of ids.')
+        if not ids:
+            raise ParseError('Missing vlog or blog ID')
+        if sum(len(pks) for pks in ids.values()) > settings.DETAIL_MAX_IDS:
+            raise ParseError(f'At most {settings.DETAIL_MAX_IDS} ids per request.')
+        return ids
+
+    def get_fieldset(self, request):
+        available = dict.fromkeys(
+            name for *_, values_serializer in self.lookups for name in values_serializer.field_names
+        )
+        return parse_fieldset(request, list(available))
+
+    def trim_items(self, items, fieldset):
+        # Cached payloads are whole objects; the fieldset only trims the output.
+        if fieldset is None:
+            return items
+        return {param: {pk: trim(item, fieldset) for pk, item in found.items()} for param, found in items.items()}
+
+    def is_batch(self, ids):
+        return len(ids) > 1 or any(len(pks) > 1 for pks in ids.values())
+
+    def to_response_data(self, ids, items):
+        """
+        Build the response from ``items``: {param: {id: serialized object}} of
+        the objects found.
+        """
+        data = {}
+        for param, key, model, values_serializer in self.lookups:
+            if param not in ids:
+                continue
+            found = {pk: items[param].get(pk) for pk in ids[param]}
+            if not self.is_batch(ids):
+                if found[ids[param][0]] is None:
+                    raise Http404(f'No {model.__name__} matches the given query.')
+                return found[ids[param][0]]
+            data[key] = found
+        return data
+
+    def get_items(self, ids):
+        """
+        Serialized objects for the parsed ``ids``, read through the detail
+        cache with one query per model for the ids it misses. Misses are read
+        from the primary so a lagging replica's rows are never cached.
+        """
+        items = {}
+        for param, key, model, values_serializer in self.lookups:
+            if param in ids:
+                def load(pks, model=model, values_serializer=values_serializer):
+                    queryset = model.objects.using(DEFAULT_DB_ALIAS).filter(id__in=pks)
+                    return {item['id']: item for item in values_serializer.serialize(queryset)}
+                items[param] = get_details(model._meta.model_name, ids[param], load)
+        return items
+
+class DetailVlogBlogView(ReplicaReadMixin, DetailLookupMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        vlog_id = request.query_params.get('vid')
-        blog_id = request.query_params.get('bid')
-
-        if vlog_id:
-            vlog = get_object_or_404(Vlog, id=vlog_id)
-            response_data = VlogSerializer(vlog).data
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        if blog_id:
-            blog = get_object_or_404(Blog, id=blog_id)
-            response_data = BlogSerializer(blog).data
-            return Response(response_data, status=status.HTTP_200_OK)
+        ids = self.parse_ids(request)
+        fieldset = self.get_fieldset(request)
+        items = self.get_items(ids)
+        # Validators from the objects' ids and updated_at, so a 304 skips
+        # rendering them.
+        versions = [
+            sorted((pk, item['updated_at']) for pk, item in items[param].items())
+            for param, *_ in self.lookups if param in ids
+        ]
+        return conditional_response(
+            request, make_etag(ids, fieldset, versions),
+            lambda: Response(self.to_response_data(ids, self.trim_items(items, fieldset)), status=status.HTTP_200_OK),
+        )
+
+class SearchView(ReplicaReadMixin, APIView):
+    """
+    Full-text search over published blogs and vlogs, best match first. ``q`` is
+    required; ``age_group``, ``gender`` and ``type`` (blog or vlog) narrow it.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = SearchPagination
+    # kind -> (model, values serializer)
+    result_types = {
+        'blog': (Blog, blog_summary_values_serializer),
+        'vlog': (Vlog, vlog_values_serializer),
+    }
+    filters = {
+        'age_group': [value for value, _ in AGE_GROUP_CHOICES],
+        'gender': [value for value, _ in GENDER_CHOICES],
+        'type': list(result_types),
+    }
+
+    def parse_filters(self, request):
+        filters = {}
+        for param, choices in self.filters.items():
+            value = request.query_params.get(param)
+            if value is not None and value not in choices:
+                raise ParseError(f'{param} must be one of: {", ".join(choices)}.')
+            filters[param] = value
+        return filters
 
-        return Response({'detail': 'Missing vlog or blog ID'}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ParseError('Missing search query q.')
+        filters = self.parse_filters(request)
+        paginator = self.pagination_class()
+        hits = paginator.paginate_search(
+            lambda limit, offset: search(
+                query, age_group=filters['age_group'], gender=filters['gender'], kind=filters['type'],
+                limit=limit, offset=offset, using=router.db_for_read(Blog),
+            ),
+            request,
+        )
+        return paginator.get_paginated_response(self.to_results(hits))
+
+    def to_results(self, hits):
+        """
+        Read the items of ``hits`` ((kind, pk) pairs) with one query per kind,
+        in rank order.
+        """
+        items = {}
+        for kind, (model, values_serializer) in self.result_types.items():
+            pks = [pk for hit_kind, pk in hits if hit_kind == kind]
+            if pks:
+                to_representation = values_serializer.row_converter()
+                for row in values_serializer.rows(model.objects.filter(id__in=pks, status=True)):
+                    item = to_representation(row)
+                    items[kind, item['id']] = {'type': kind, **item}
+        return [items[hit] for hit in hits if hit in items]
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of APIView for read-only JSON endpoints served
+    under ASGI: JWT authentication, DRF exception responses and JSON rendering.
+    Handlers return the response data.
+    """
+    authentication_class = CachedJWTAuthentication
+    http_method_names = ['get']
+
+    async def authenticate(self, request):
+        authenticator = self.authentication_class()
+        result = await sync_to_async(authenticator.authenticate)(request)
+        if result is None:
+            raise NotAuthenticated()
+        return result[0]
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request)
+        try:
+            handler = getattr(self, request.method.lower(), None)
+            if request.method.lower() not in self.http_method_names or handler is None:
+                raise MethodNotAllowed(request.method)
+            request.user = await self.authenticate(request._request)
+            await aread_from_replica(request.user)
+            data = await handler(request, *args, **kwargs)
+            response_status = status.HTTP_200_OK
+        except Http404:
+            data, response_status = {'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND
+        except APIException as exc:
+            data, response_status = {'detail': exc.detail}, exc.status_code
+        response = HttpResponse(ORJSONRenderer().render(data), status=response_status,
+                                content_type='application/json')
+        if response_status == status.HTTP_401_UNAUTHORIZED:
+            response['WWW-Authenticate'] = self.authentication_class().authenticate_header(request)
+        return response
+
+class AsyncHomeFeedView(FeedFieldsetMixin, AsyncAPIView):
+    """
+    Async HomeFeedView: segments missing from the feed cache have their blog and
+    vlog queries run concurrently.
+    """
+    pagination_class = FeedCursorPagination
+
+    async def get(self, request, *args, **kwargs):
+        context = await sync_to_async(user_context)(request.user)
+        segments = children_segments(context['children'])
+        fieldset = self.get_fieldset(request)
+        paginator = self.pagination_class()
+        if push_enabled() and segments:
+            page = await sync_to_async(feed_page)(request.user, paginator, request)
+        else:
+            page = paginator.paginate_feed(await aget_feed(segments), request)
+        return {'next': paginator.next_link, **self.trim_page(page, fieldset)}
+
+class AsyncDetailVlogBlogView(DetailLookupMixin, AsyncAPIView):
+    """
+    Async DetailVlogBlogView; detail cache misses are read on a worker thread.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        ids = self.parse_ids(request)
+        fieldset = self.get_fieldset(request)
+        items = await sync_to_async(self.get_items)(ids)
+        return self.to_response_data(ids, self.trim_items(items, fieldset))
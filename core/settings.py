@@ -49,11 +49,69 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'blog.authentication.CachedJWTAuthentication',
     ),
+    # JSON through orjson and MessagePack on Accept: application/msgpack, each
+    # when its library is installed.
+    'DEFAULT_RENDERER_CLASSES': (
+        'blog.renderers.ORJSONRenderer',
+        'blog.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'blog.renderers.AvailableRendererNegotiation',
+}
+
+# Response compression by CompressionMiddleware: brotli when installed, else gzip.
+COMPRESSION = {
+    # Smallest body, in bytes, worth compressing.
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    # 0-11; higher compresses better but much slower.
+    'BROTLI_QUALITY': 4,
+    # Only API responses are compressed. HTML pages (the admin, the browsable
+    # API) carry CSRF tokens next to reflected input, which compression would
+    # expose to BREACH.
+    'CONTENT_TYPES': ['application/json', 'application/msgpack'],
+}
+
+# Default and maximum ?page_size= for the cursor-paginated feed and content lists.
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Rows fetched per database round trip and flushed per chunk by ?stream=1 responses.
+STREAM_CHUNK_SIZE = 500
+
+# Largest list accepted by the bulk/ endpoints, and rows per INSERT/UPDATE statement.
+BULK_MAX_ITEMS = 10000
+BULK_BATCH_SIZE = 1000
+
+# Most vlog and blog ids one /api/detail/ request may ask for.
+DETAIL_MAX_IDS = 100
+
+# Bulk parent onboarding: processes the onboard_parents command hashes
+# passwords on (None for one per CPU), and the most parents one
+# /api/register/bulk/ request may create. The endpoint hashes inline, each
+# password taking a few hundred milliseconds; use the command for large imports.
+ONBOARDING_WORKERS = None
+ONBOARDING_MAX_ITEMS = 10
+
+# Per-view request metrics, scraped from /metrics in the Prometheus text format.
+METRICS = {
+    # Bearer token /metrics requires; None leaves it open.
+    'TOKEN': None,
+    # Log queries taking at least this many milliseconds; None disables it.
+    'SLOW_QUERY_MS': None,
+    # Directory the worker processes write their metrics to, so /metrics can
+    # add them up; None keeps them per process. Empty it before starting.
+    'MULTIPROCESS_DIR': os.environ.get("METRICS_MULTIPROCESS_DIR"),
+    # Longest a worker waits before writing what it recorded.
+    'FLUSH_SECONDS': 1,
 }
 
 MIDDLEWARE = [
+    "blog.metrics.MetricsMiddleware",
+    "blog.compression.CompressionMiddleware",
+    "blog.replicas.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -87,13 +145,114 @@ WSGI_APPLICATION = "core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# Seconds a database connection is kept open for the next request; 0 closes it
+# at the end of every request. Persistent connections are health-checked first.
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 0))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": DB_CONN_MAX_AGE > 0,
+    }
+}
+
+# Read replica, e.g. a copy of db.sqlite3 to try routing locally. Tests read
+# the default test database through it.
+if os.environ.get("DB_REPLICA_NAME"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.environ["DB_REPLICA_NAME"],
+        "TEST": {"MIRROR": "default"},
+    }
+
+# Aliases read-only requests are spread over (see blog.replicas).
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["blog.replicas.ReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after a request of theirs wrote,
+# so they read their own writes despite replication lag.
+REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+# The in-process default suits a single process only: invalidations made by
+# one worker don't reach the others. Set CACHE_REDIS_URL (e.g.
+# redis://127.0.0.1:6379/1) to share one Redis cache between every worker.
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "parentune",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
     }
+
+# Whether every process reads and invalidates the same cache.
+SHARED_CACHE = bool(CACHE_REDIS_URL)
+
+# Seconds a per-segment home feed stays cached. Entries are also dropped as soon
+# as a matching Blog or Vlog is saved or deleted.
+FEED_CACHE_TIMEOUT = 60 * 15
+
+# How home feeds are read. 'pull' queries the (cached) per-segment feeds on
+# request; 'push' writes a FeedEntry per recipient when an item is published
+# and pages through the user's entries. Run backfill_feed_inbox before
+# switching to 'push'. Parents without children always use the pull feed.
+FEED_MODE = 'pull'
+
+# Whether push mode fan-out runs on a background thread after the publishing
+# transaction commits, rather than inline in the request.
+FEED_FANOUT_BACKGROUND = True
+
+# Scoring of the ranked home feed. An item scores 1, plus for each child
+# 'age' if it is for the child's age group and 'gender' if it is for the
+# child's gender ('any_gender' if it is for any gender); the score halves
+# every 'half_life_hours' of the item's age. First-time parents weigh content
+# for their children's stage over fresh content; experienced ones the reverse.
+FEED_RANKING = {
+    "PARENT_TYPES": {
+        "first-time": {"age": 2.0, "gender": 1.0, "any_gender": 0.5, "half_life_hours": 24 * 14},
+        "experienced": {"age": 1.0, "gender": 1.0, "any_gender": 0.5, "half_life_hours": 24 * 3},
+    },
+    # Weights of parents without a profile.
+    "DEFAULT_PARENT_TYPE": "first-time",
+}
+
+# Read-through cache of serialized blogs and vlogs for the detail endpoint.
+DETAIL_CACHE = {
+    # Only with a shared cache: a save gives the object a new version in the
+    # cache of the process that handled it, so with per-process caches the
+    # other workers would keep serving the old payload until TIMEOUT.
+    "ENABLED": SHARED_CACHE,
+    # Seconds a payload stays in the shared cache. Saving or deleting an object
+    # gives it a new cache version, so this only bounds memory use.
+    "TIMEOUT": 60 * 60,
+    # Payloads each process keeps in memory in front of the shared cache.
+    "LOCAL_MAX_ENTRIES": 1000,
+    # Seconds other requests wait for the one recomputing a payload.
+    "LOCK_TIMEOUT": 5,
 }
 
+# Seconds the per-user authentication and personalization context stays cached.
+# It is also invalidated whenever the user, their profile or a child is written,
+# but with the in-process cache only in the worker that handled the write: the
+# others would keep accepting a deactivated user or a changed password until the
+# context expires, so it is kept for seconds only.
+AUTH_CONTEXT_TIMEOUT = 60 * 60 if SHARED_CACHE else 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -141,4 +300,15 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'blog.tokens.TokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'blog.tokens.TokenVerifySerializer',
+}
+
+# In-process filter of blacklisted refresh token JTIs (see blog.blacklist).
+# Tokens blacklisted by other workers are seen after at most SYNC_INTERVAL seconds.
+TOKEN_BLACKLIST_FILTER = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'CONFIRM_SIZE': 100000,
+    'SYNC_INTERVAL': 5,
 }
\ No newline at end of file